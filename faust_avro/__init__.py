@@ -1,11 +1,12 @@
 from faust_avro.app import App
 from faust_avro.exceptions import (
     CodecException,
+    InvalidNameError,
     SchemaAlreadyDefinedError,
     SchemaException,
     UnknownTypeError,
 )
-from faust_avro.record import Record
+from faust_avro.record import LazyRecord, Record
 from faust_avro.types import datetime_millis, float32, int32, time_millis
 
 __all__ = [
@@ -15,6 +16,8 @@ __all__ = [
     "datetime_millis",
     "App",
     "CodecException",
+    "InvalidNameError",
+    "LazyRecord",
     "Record",
     "SchemaException",
     "SchemaAlreadyDefinedError",
@@ -1,36 +1,100 @@
 import asyncio
+import time
+import weakref
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote
 
 import click
 import faust
+from faust.types import TopicT
 
-from faust_avro.asyncio import ConfluentSchemaRegistryClient
+from faust_avro.asyncio import (
+    ConfluentSchemaRegistryClient,
+    SchemaNotFound,
+    SubjectNotFound,
+)
+from faust_avro.compatibility import Compatibility
 from faust_avro.record import Record
-from faust_avro.serializers import Schema
+from faust_avro.serializers import Codec, Schema
+from faust_avro.store import SchemaStore
 from faust_avro.topic import Topic
 
 
 class App(faust.App):
-    avro_schema_registry: ConfluentSchemaRegistryClient
+    avro_schema_store: SchemaStore
 
-    def __init__(self, *args, registry_url="http://localhost:8081", **kwargs):
+    def __init__(
+        self,
+        *args,
+        registry_url="http://localhost:8081",
+        registry_concurrency=10,
+        schema_store=None,
+        **kwargs,
+    ):
         """Create a new Avro enabled Faust app.
 
-        :param registry_url: The base URL to the schema registry.
+        :param registry_url: The base URL to the schema registry, or a list of them to
+            fail over between.
+        :param registry_concurrency: The most schema registry requests to make at once
+            when syncing schemas in bulk, eg at startup.
+        :param schema_store: A directory of .avsc files with the writer schemas of
+            topics using single-object encoding, see SingleObjectCodec.
         """
+        self.registry_url = registry_url
+        self.registry_concurrency = registry_concurrency
+        self._avro_schema_registry: Optional[ConfluentSchemaRegistryClient] = None
+        # Weak, as topics are often made in passing, eg to send a message.
+        self._avro_topics: "weakref.WeakSet[Topic]" = weakref.WeakSet()
+        self.avro_schema_store = SchemaStore(schema_store)
         kwargs.setdefault("Schema", Schema)
         kwargs.setdefault("Topic", Topic)
         super().__init__(*args, **kwargs)
-        self.avro_schema_registry = ConfluentSchemaRegistryClient(registry_url)
 
         @self.command()
         async def register(_):
             """Register faust_avro.Record schemas with the schema registry."""
-            channels = [agent.channel for agent in _.app.agents.values()]
-            topics = [chan for chan in channels if isinstance(chan, Topic)]
-            tasks = [topic.compatible(_.app) for topic in topics]
-            if all(await asyncio.gather(*tasks)):
-                tasks = [topic.register(_.app) for topic in topics]
-                await asyncio.gather(*tasks)
+            start = time.monotonic()
+            await _.app.avro_schema_registry.start()
+            try:
+                outcomes = await _.app.register_schemas()
+            finally:
+                await _.app.avro_schema_registry.close()
+            _.say(
+                f"{outcomes['registered']} registered, "
+                f"{outcomes['existing']} already registered, "
+                f"{outcomes['incompatible']} incompatible, "
+                f"{outcomes['failed']} failed in {time.monotonic() - start:.3f}s."
+            )
+
+        @self.command(
+            faust.cli.option(
+                "--level",
+                type=click.Choice([level.name for level in Compatibility]),
+                default=Compatibility.BACKWARD.name,
+                help="The compatibility level of the subjects.",
+            ),
+            faust.cli.option(
+                "--fetch",
+                is_flag=True,
+                default=False,
+                help="Fetch the versions of the subjects from the registry first.",
+            ),
+        )
+        async def compatibility(_, level, fetch):
+            """Check schemas against the cached versions of their subjects, offline."""
+            if fetch:
+                await _.app.avro_schema_registry.start()
+                try:
+                    await _.app.fetch_versions()
+                finally:
+                    await _.app.avro_schema_registry.close()
+            problems = _.app.check_schemas(Compatibility[level])
+            for subject, problem in problems:
+                _.say(f"{subject}: {problem}")
+            if problems:
+                raise click.Abort()
 
         @self.command(faust.cli.argument("model"))
         async def schema(_, model):
@@ -40,3 +104,155 @@ class App(faust.App):
                 _.say(record.to_avro(_.app.avro_schema_registry.registry))
             else:
                 raise click.Abort(f"{model} is not an avro-based Record.")
+
+    @property
+    def avro_schema_registry(self) -> ConfluentSchemaRegistryClient:
+        """The schema registry client, created on first use rather than with the
+        app, so it caches schemas in the datadir the app is configured with."""
+        if self._avro_schema_registry is None:
+            url = self.registry_url
+            primary = url if isinstance(url, str) else url[0]
+            self._avro_schema_registry = ConfluentSchemaRegistryClient(
+                url,
+                # Schema ids are per registry, so each gets its own cache.
+                cache_dir=Path(self.conf.datadir, "schemas", quote(primary, safe="")),
+            )
+        return self._avro_schema_registry
+
+    def topic(self, *topics: str, **kwargs: Any) -> TopicT:
+        topic = super().topic(*topics, **kwargs)
+        if isinstance(topic, Topic):
+            self._avro_topics.add(topic)
+        return topic
+
+    def avro_topics(self) -> List[Topic]:
+        """All of this app's topics, including agent channels and changelogs."""
+        topics: Dict[int, Topic] = dict()
+        for table in self.tables.values():
+            topics.setdefault(id(table.changelog_topic), table.changelog_topic)
+        for agent in self.agents.values():
+            topics.setdefault(id(agent.channel), agent.channel)
+        for topic in self._avro_topics:
+            topics.setdefault(id(topic), topic)
+        return [
+            topic
+            for topic in topics.values()
+            if isinstance(topic, Topic) and isinstance(topic.schema, Schema)
+        ]
+
+    async def warm_up(self) -> None:
+        """Sync the schema ids of all avro topics, before any messages need them."""
+        semaphore = asyncio.Semaphore(self.registry_concurrency)
+
+        async def sync(codec: Codec, app: App, subject: str) -> None:
+            if codec.schema_id is None:
+                async with semaphore:
+                    await codec.sync(app, subject)
+
+        start = time.monotonic()
+        tasks = [
+            task
+            for topic in self.avro_topics()
+            for task in topic.schema._spray(self, topic, sync)
+        ]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        errors = [result for result in results if isinstance(result, Exception)]
+        for error in errors:
+            self.log.warning("Unable to sync an avro schema: %r", error)
+        self.log.info(
+            "Synced %d avro schemas in %.3fs, %d failed.",
+            len(results) - len(errors),
+            time.monotonic() - start,
+            len(errors),
+        )
+
+    async def register_schemas(self) -> Dict[str, int]:
+        """Register the schemas of all avro topics, unless they already are.
+
+        Nothing is registered unless every new schema is compatible with its
+        subject, and the registry could be reached for all of them.
+
+        :returns: How many schemas were registered, already registered,
+            incompatible or failed to check.
+        """
+        semaphore = asyncio.Semaphore(self.registry_concurrency)
+        outcomes: Dict[str, int] = Counter()
+        pending: List[Tuple[Codec, str]] = []
+
+        async def check(codec: Codec, app: App, subject: str) -> None:
+            async with semaphore:
+                try:
+                    await codec.sync(app, subject)
+                    outcomes["existing"] += 1
+                except (SchemaNotFound, SubjectNotFound):
+                    if await codec.compatible(app, subject):
+                        pending.append((codec, subject))
+                    else:
+                        outcomes["incompatible"] += 1
+
+        async def register(codec: Codec, subject: str) -> None:
+            async with semaphore:
+                await codec.register(self, subject)
+                outcomes["registered"] += 1
+
+        tasks = [
+            task
+            for topic in self.avro_topics()
+            for task in topic.schema._spray(self, topic, check)
+        ]
+        for result in await asyncio.gather(*tasks, return_exceptions=True):
+            if isinstance(result, Exception):
+                self.log.warning("Unable to check an avro schema: %r", result)
+                outcomes["failed"] += 1
+
+        if not outcomes["incompatible"] and not outcomes["failed"]:
+            await asyncio.gather(*[register(*args) for args in pending])
+        return outcomes
+
+    async def fetch_versions(self) -> None:
+        """Fetch every version of the subjects of all avro topics, for check_schemas."""
+        semaphore = asyncio.Semaphore(self.registry_concurrency)
+
+        async def fetch(codec: Codec, app: App, subject: str) -> None:
+            async with semaphore:
+                await codec.fetch_versions(app, subject)
+
+        await asyncio.gather(
+            *[
+                task
+                for topic in self.avro_topics()
+                for task in topic.schema._spray(self, topic, fetch)
+            ]
+        )
+
+    def check_schemas(
+        self, level: Compatibility = Compatibility.BACKWARD
+    ) -> List[Tuple[str, str]]:
+        """Check all avro topics against the cached versions of their subjects.
+
+        Subjects with no cached versions are reported as problems, unless
+        fetched (see fetch_versions) and found to have none.
+
+        :param level: The compatibility level of the subjects.
+
+        :returns: Each incompatibility found, with the subject it was found in.
+        """
+
+        def check(codec: Codec, app: App, subject: str) -> List[Tuple[str, str]]:
+            return [(subject, problem) for problem in codec.check(app, subject, level)]
+
+        return [
+            problem
+            for topic in self.avro_topics()
+            for problems in topic.schema._spray(self, topic, check)
+            for problem in problems
+        ]
+
+    async def on_start(self) -> None:
+        await super().on_start()
+        await self.avro_schema_registry.start()
+        await self.warm_up()
+
+    async def on_stop(self) -> None:
+        await super().on_stop()
+        await self.avro_schema_registry.close()
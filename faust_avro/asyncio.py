@@ -1,7 +1,16 @@
 import asyncio
 import contextlib
+import json
+import logging
+import os
+import random
+import tempfile
 import threading
+import time
 import typing
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import quote, unquote
 
 import aiohttp
 
@@ -11,7 +20,9 @@ JSON = typing.AsyncGenerator[typing.Dict[str, typing.Any], None]
 SchemaID = int
 Subject = str
 Schema = str
+T = typing.TypeVar("T")
 
+logger = logging.getLogger(__name__)
 
 GET = {"Accept": "application/vnd.schemaregistry.v1+json"}
 POST = {
@@ -51,34 +62,330 @@ class SubjectNotFound(SchemaException):
     """The schema registry has no such subject."""
 
 
+class RegistryUnavailable(SchemaException):
+    """None of the schema registry's URLs could be reached in time."""
+
+
+class Version(typing.NamedTuple):
+    """A schema registered under a subject."""
+
+    # None if not known, as registering a schema doesn't say.
+    number: typing.Optional[int]
+    id: SchemaID
+    schema: Schema
+
+
+class Endpoint:
+    """One schema registry URL, with a circuit breaker tracking its health."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.failures = 0
+        self.opened_at: typing.Optional[float] = None
+
+    def available(self, now: float, reset_timeout: float) -> bool:
+        # Once open, the circuit lets a trial request through after a while.
+        return self.opened_at is None or now - self.opened_at >= reset_timeout
+
+    def succeeded(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+
+    def failed(self, now: float, threshold: int) -> None:
+        self.failures += 1
+        if self.failures >= threshold:
+            self.opened_at = now
+
+
 class ConfluentSchemaRegistryClient:
     """A Confluent AVRO Schema Registry Client.
 
     Ref: https://docs.confluent.io/1.0/schema-registry/docs/intro.html"""
 
-    def __init__(self, url: str = "http://localhost:8081"):
+    def __init__(
+        self,
+        url: typing.Union[str, typing.Sequence[str]] = "http://localhost:8081",
+        *,
+        limit_per_host: int = 10,
+        keepalive_timeout: float = 30,
+        timeout: float = 10,
+        deadline: float = 30,
+        retries: int = 3,
+        backoff: float = 0.1,
+        max_backoff: float = 2,
+        failure_threshold: int = 3,
+        reset_timeout: float = 30,
+        latest_ttl: float = 60,
+        not_found_ttl: float = 10,
+        cache_dir: typing.Optional[typing.Union[str, Path]] = None,
+    ):
         """Create a new Confluent schema registry client.
 
-        :param url: The base URL to the schema registry.
+        :param url: The base URL to the schema registry, or a list of them to fail over between.
+        :param limit_per_host: The most connections to keep open to the registry.
+        :param keepalive_timeout: How long to keep an idle connection open, in seconds.
+        :param timeout: How long to wait for any one request, in seconds.
+        :param deadline: How long to keep retrying any one call, in seconds.
+        :param retries: How many more times to try each URL after failures.
+        :param backoff: The base delay between retries, in seconds, doubled every retry.
+        :param max_backoff: The most to delay between retries, in seconds.
+        :param failure_threshold: How many failures in a row take a URL out of use.
+        :param reset_timeout: How long to leave a failing URL out of use, in seconds.
+        :param latest_ttl: How long to cache the latest schema of a subject, in seconds.
+        :param not_found_ttl: How long to remember that a subject or schema wasn't found, in seconds.
+        :param cache_dir: A directory to keep schemas and their ids in across restarts.
         """
-        self.url: str = url
+        urls = [url] if isinstance(url, str) else list(url)
+        self.endpoints = [Endpoint(u) for u in urls]
+        self.deadline = deadline
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
         self.registry: Registry = Registry()
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self._session: typing.Optional[aiohttp.ClientSession] = None
+        self._session_loop: typing.Optional[asyncio.AbstractEventLoop] = None
+
+        # Schema ids are immutable, so those are cached forever. Anything
+        # that can change on the registry is only cached for a while.
+        self.latest_ttl = latest_ttl
+        self.not_found_ttl = not_found_ttl
+        self._schemas: typing.Dict[SchemaID, Schema] = dict()
+        self._ids: typing.Dict[typing.Tuple[Subject, Schema], SchemaID] = dict()
+        # The version number of each schema under a subject, where known.
+        self._numbers: typing.Dict[typing.Tuple[Subject, Schema], int] = dict()
+        self._latest: typing.Dict[Subject, typing.Tuple[float, Schema]] = dict()
+        self._not_found: typing.Dict[
+            typing.Hashable, typing.Tuple[float, SchemaException]
+        ] = dict()
+        self._in_flight: typing.Dict[typing.Hashable, asyncio.Future] = dict()
+        # Subjects with every version fetched, even if none were registered.
+        self._fetched: typing.Set[Subject] = set()
+
+        self.cache_dir = None if cache_dir is None else Path(cache_dir)
+        # Writes to cache_dir, in order, off the event loop.
+        self._writer: typing.Optional[ThreadPoolExecutor] = None
+        self._load()
+
+    def _load(self) -> None:
+        """Load the schemas and ids stored by earlier runs, if any."""
+        if self.cache_dir is None:
+            return
+        # Stray or damaged files are skipped, as the cache only saves requests.
+        for path in self.cache_dir.glob("ids/*.avsc"):
+            try:
+                self._schemas[int(path.stem)] = path.read_text()
+            except (ValueError, OSError) as e:
+                logger.warning("Skipping cached schema %s: %r", path, e)
+        for path in self.cache_dir.glob("subjects/*.json"):
+            subject = unquote(path.stem)
+            try:
+                entries = {
+                    schema: (entry["id"], entry["version"])
+                    for schema, entry in json.loads(path.read_text()).items()
+                }
+            except (ValueError, TypeError, KeyError, OSError) as e:
+                logger.warning("Skipping cached ids %s: %r", path, e)
+                continue
+            for schema, (schema_id, number) in entries.items():
+                self._ids[subject, schema] = schema_id
+                if number is not None:
+                    self._numbers[subject, schema] = number
+
+    def _write(self, target: Path, text: str) -> None:
+        """Write a file into cache_dir, logging rather than raising any failure,
+        as the cache only saves requests."""
+        try:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            # Written aside and renamed into place, so readers never see half a file.
+            temp = tempfile.NamedTemporaryFile(
+                "w", dir=target.parent, prefix=f".{target.name}.", delete=False
+            )
+            try:
+                with temp:
+                    temp.write(text)
+                os.replace(temp.name, target)
+            except BaseException:
+                with contextlib.suppress(OSError):
+                    os.unlink(temp.name)
+                raise
+        except OSError:
+            logger.warning("Could not cache %s.", target, exc_info=True)
+
+    async def _store(self, path: str, text: str) -> None:
+        if self.cache_dir is None:
+            return
+        if self._writer is None:
+            self._writer = ThreadPoolExecutor(1, thread_name_prefix="faust-avro-cache")
+        await asyncio.get_running_loop().run_in_executor(
+            self._writer, self._write, self.cache_dir / path, text
+        )
+
+    async def _remember_schema(self, id: SchemaID, schema: Schema) -> None:
+        if id not in self._schemas:
+            self._schemas[id] = schema
+            await self._store(f"ids/{id}.avsc", schema)
+
+    async def _remember_id(
+        self,
+        subject: Subject,
+        schema: Schema,
+        id: SchemaID,
+        number: typing.Optional[int] = None,
+    ) -> None:
+        await self._remember_schema(id, schema)
+        key = (subject, schema)
+        if self._ids.get(key) != id or (
+            number is not None and self._numbers.get(key) != number
+        ):
+            self._ids[key] = id
+            if number is not None:
+                self._numbers[key] = number
+            entries = {
+                s: dict(id=i, version=self._numbers.get((sub, s)))
+                for (sub, s), i in self._ids.items()
+                if sub == subject
+            }
+            await self._store(
+                f"subjects/{quote(subject, safe='')}.json", json.dumps(entries)
+            )
+
+    async def start(self) -> None:
+        """Open a pooled, keep-alive session for requests made on this loop."""
+        if self._session is None:
+            self._session_loop = asyncio.get_running_loop()
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit_per_host=self.limit_per_host,
+                    keepalive_timeout=self.keepalive_timeout,
+                ),
+                timeout=self.timeout,
+            )
+
+    async def close(self) -> None:
+        """Close the pooled session, if open."""
+        session, self._session, self._session_loop = self._session, None, None
+        if session is not None:
+            await session.close()
+        writer, self._writer = self._writer, None
+        if writer is not None:
+            # Writes already submitted still finish.
+            writer.shutdown(wait=False)
+
+    async def _once(
+        self, key: typing.Hashable, fetch: typing.Callable[[], typing.Awaitable[T]]
+    ) -> T:
+        """Coalesce concurrent fetches of the same key into a single request."""
+        if key in self._not_found:
+            expires, error = self._not_found[key]
+            if time.monotonic() < expires:
+                raise type(error)(*error.args)
+            del self._not_found[key]
+
+        # Futures belong to a loop, so only requests on the same loop coalesce.
+        flight = (asyncio.get_running_loop(), key)
+        try:
+            future = self._in_flight[flight]
+        except KeyError:
+            future = self._in_flight[flight] = asyncio.ensure_future(fetch())
+            future.add_done_callback(lambda _: self._in_flight.pop(flight, None))
+
+        try:
+            # Shielded, so that one caller being cancelled doesn't cancel the
+            # request out from under everyone else waiting on it.
+            return await asyncio.shield(future)
+        except (SchemaNotFound, SubjectNotFound) as e:
+            self._not_found[key] = (time.monotonic() + self.not_found_ttl, e)
+            raise
+
+    def _forget(self, subject: Subject, schema: Schema) -> None:
+        self._latest.pop(subject, None)
+        self._not_found.pop(("sync", subject, schema), None)
+        self._not_found.pop(("latest", subject), None)
 
     @contextlib.asynccontextmanager
-    async def get(self, path: str) -> JSON:
+    async def session(self) -> typing.AsyncGenerator[aiohttp.ClientSession, None]:
+        if (
+            self._session is not None
+            and self._session_loop is asyncio.get_running_loop()
+        ):
+            yield self._session
+        else:
+            # Before start(), or from another loop (eg, run_in_thread), which
+            # can't share the pooled session's connections.
+            async with aiohttp.ClientSession(timeout=self.timeout) as session:
+                yield session
+
+    @property
+    def url(self) -> str:
+        """The URL that the next request will try first."""
+        return (self._endpoints() or self.endpoints)[0].url
+
+    def _endpoints(self) -> typing.List[Endpoint]:
+        """URLs whose circuit isn't open, healthiest first."""
+        now = time.monotonic()
+        available = [e for e in self.endpoints if e.available(now, self.reset_timeout)]
+        return sorted(available, key=lambda e: e.failures)
+
+    async def _attempt(self, method: str, url: str, **kwargs: typing.Any) -> typing.Any:
         # We can't use raise_for_status because it causes vcrpy to not write
         # that response into the cassettes.
-        async with aiohttp.ClientSession(headers=GET) as session:
-            async with session.get(self.url + path) as response:
-                yield await response.json()
+        async with self.session() as session:
+            async with session.request(method, url, **kwargs) as response:
+                if response.status >= 500 or response.status == 429:
+                    await response.read()
+                    raise RegistryUnavailable(f"{url} returned {response.status}.")
+                return await response.json()
+
+    async def _request(
+        self, method: str, path: str, **kwargs: typing.Any
+    ) -> typing.Any:
+        """Make a request, retrying and failing over between URLs until the deadline."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.deadline
+        error: Exception = RegistryUnavailable("All schema registries are failing.")
+        for attempt in range(self.retries + 1):
+            endpoints = self._endpoints()
+            if not endpoints:
+                # Every circuit is open, so fail fast rather than wait them out.
+                break
+            for endpoint in endpoints:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    json = await asyncio.wait_for(
+                        self._attempt(method, endpoint.url + path, **kwargs), remaining
+                    )
+                except (
+                    aiohttp.ClientError,
+                    asyncio.TimeoutError,
+                    RegistryUnavailable,
+                ) as e:
+                    endpoint.failed(time.monotonic(), self.failure_threshold)
+                    error = e
+                else:
+                    endpoint.succeeded()
+                    return json
+
+            # Full jitter, so that many clients don't retry in lockstep.
+            delay = random.uniform(0, min(self.max_backoff, self.backoff * 2**attempt))
+            if attempt == self.retries or loop.time() + delay >= deadline:
+                break
+            await asyncio.sleep(delay)
+        raise RegistryUnavailable(f"{method} {path} failed: {error!r}") from error
+
+    @contextlib.asynccontextmanager
+    async def get(self, path: str) -> JSON:
+        yield await self._request("GET", path, headers=GET)
 
     @contextlib.asynccontextmanager
     async def post(self, path: str, **json: typing.Any) -> JSON:
-        # We can't use raise_for_status because it causes vcrpy to not write
-        # that response into the cassettes.
-        async with aiohttp.ClientSession(headers=POST) as session:
-            async with session.post(self.url + path, json=json) as response:
-                yield await response.json()
+        yield await self._request("POST", path, headers=POST, json=json)
 
     async def subjects(self) -> typing.List[Subject]:
         """
@@ -97,8 +404,27 @@ class ConfluentSchemaRegistryClient:
 
         :returns: The schema's definition.
         """
+        if subject in self._latest:
+            expires, schema = self._latest[subject]
+            if time.monotonic() < expires:
+                return schema
+        try:
+            return await self._once(
+                ("latest", subject), lambda: self._latest_of(subject)
+            )
+        except RegistryUnavailable:
+            if subject in self._latest:
+                # A stale schema beats none while the registry is down.
+                return self._latest[subject][1]
+            raise
+
+    async def _latest_of(self, subject: Subject) -> Schema:
         async with self.get(f"/subjects/{subject}/versions/latest") as json:
-            return json["schema"]
+            if json.get("error_code", False) == 40401:
+                raise SubjectNotFound(subject)
+            schema = json["schema"]
+        self._latest[subject] = (time.monotonic() + self.latest_ttl, schema)
+        return schema
 
     async def schema_by_id(self, id: SchemaID) -> Schema:
         """
@@ -108,8 +434,18 @@ class ConfluentSchemaRegistryClient:
 
         :returns: The schema's definition.
         """
+        try:
+            return self._schemas[id]
+        except KeyError:
+            return await self._once(("id", id), lambda: self._schema_of(id))
+
+    async def _schema_of(self, id: SchemaID) -> Schema:
         async with self.get(f"/schemas/ids/{id}") as json:
-            return json["schema"]
+            if json.get("error_code", False) == 40403:
+                raise SchemaNotFound(id)
+            schema = json["schema"]
+        await self._remember_schema(id, schema)
+        return schema
 
     async def register(self, subject: Subject, schema: Schema) -> SchemaID:
         """
@@ -123,7 +459,10 @@ class ConfluentSchemaRegistryClient:
         :returns: The id of the schema.
         """
         async with self.post(f"/subjects/{subject}/versions", schema=schema) as json:
-            return json["id"]
+            schema_id = json["id"]
+        await self._remember_id(subject, schema, schema_id)
+        self._forget(subject, schema)
+        return schema_id
 
     async def sync(self, subject: Subject, schema: Schema) -> SchemaID:
         """
@@ -134,6 +473,14 @@ class ConfluentSchemaRegistryClient:
 
         :returns: The id of the schema.
         """
+        try:
+            return self._ids[subject, schema]
+        except KeyError:
+            return await self._once(
+                ("sync", subject, schema), lambda: self._id_of(subject, schema)
+            )
+
+    async def _id_of(self, subject: Subject, schema: Schema) -> SchemaID:
         async with self.post(f"/subjects/{subject}", schema=schema) as json:
             if json.get("error_code", False) == 40401:
                 # "Subject not found" -- no schemas ever registered on this topic-key/value.
@@ -142,9 +489,53 @@ class ConfluentSchemaRegistryClient:
                 # "Schema not found" -- this schema has not been registered.
                 raise SchemaNotFound(schema)
             try:
-                return json["id"]
+                schema_id = json["id"]
             except KeyError:
                 raise SchemaException(json)
+            number = json.get("version")
+        await self._remember_id(subject, schema, schema_id, number)
+        return schema_id
+
+    def cached_versions(
+        self, subject: Subject
+    ) -> typing.Optional[typing.List[Version]]:
+        """
+        The schemas known to be registered under a subject, without making any requests.
+
+        :param subject: The `subject <https://docs.confluent.io/current/schema-registry/index.html>`_ the schemas are registered under.
+
+        :returns: The versions, oldest first, or None if nothing is known of the subject.
+            Versions of unknown number were registered through this client, so come last.
+        """
+        versions = [
+            Version(self._numbers.get((sub, s)), id, s)
+            for (sub, s), id in self._ids.items()
+            if sub == subject
+        ]
+        if not versions and subject not in self._fetched:
+            return None
+        # Ids are only unique, not ordered, as subjects share them.
+        return sorted(versions, key=lambda v: (v.number is None, v.number or 0, v.id))
+
+    async def versions(self, subject: Subject) -> typing.List[Version]:
+        """
+        Fetch every schema registered under a subject, caching them for cached_versions.
+
+        :param subject: The `subject <https://docs.confluent.io/current/schema-registry/index.html>`_ the schemas are registered under.
+
+        :returns: The versions, oldest first, none if the subject doesn't exist.
+        """
+        async with self.get(f"/subjects/{subject}/versions") as json:
+            if isinstance(json, dict) and json.get("error_code", False) == 40401:
+                numbers = []
+            else:
+                numbers = typing.cast(typing.List[int], json)
+        for number in numbers:
+            async with self.get(f"/subjects/{subject}/versions/{number}") as json:
+                schema, schema_id = json["schema"], json["id"]
+            await self._remember_id(subject, schema, schema_id, number)
+        self._fetched.add(subject)
+        return typing.cast(typing.List[Version], self.cached_versions(subject))
 
     async def compatible(self, subject: Subject, schema: Schema) -> bool:
         """
@@ -171,5 +562,7 @@ class ConfluentSchemaRegistryClient:
         :param schema: The schema to register, per the `AVRO specification <https://avro.apache.org/docs/current/spec.html>`_
 
         """
+        if (subject, schema) in self._ids:
+            return True
         async with self.post(f"/subjects/{subject}", schema=schema) as json:
             return "error_code" not in json
@@ -0,0 +1,153 @@
+"""
+Avro schema compatibility, checked locally instead of by the schema registry.
+
+Whether data written with one schema can be read with another follows the
+avro schema resolution rules. The compatibility levels are those of the
+Confluent schema registry, where versions are ordered oldest first.
+
+Ref: https://avro.apache.org/docs/current/spec.html#Schema+Resolution
+Ref: https://docs.confluent.io/current/schema-registry/avro.html
+"""
+
+from enum import Enum
+from typing import List, Sequence, Set, Tuple
+
+from faust_avro.decoder import matches, unwrap
+from faust_avro.schema import (
+    MISSING,
+    AvroArray,
+    AvroEnum,
+    AvroMap,
+    AvroRecord,
+    AvroUnion,
+    NamedSchema,
+    Schema,
+)
+from faust_avro.walk import MAX_DEPTH, fresh_stack
+
+__all__ = ["Compatibility", "can_read", "compatible"]
+
+
+class Compatibility(Enum):
+    """Which versions of a subject a new schema must be compatible with."""
+
+    NONE = "NONE"
+    BACKWARD = "BACKWARD"
+    BACKWARD_TRANSITIVE = "BACKWARD_TRANSITIVE"
+    FORWARD = "FORWARD"
+    FORWARD_TRANSITIVE = "FORWARD_TRANSITIVE"
+    FULL = "FULL"
+    FULL_TRANSITIVE = "FULL_TRANSITIVE"
+
+
+def name_of(schema: Schema) -> str:
+    if isinstance(schema, NamedSchema):
+        return schema.name
+    return type(schema).__name__
+
+
+class _Checker:
+    """Walks a writer and reader schema together, collecting the problems."""
+
+    def __init__(self) -> None:
+        self.problems: List[str] = list()
+        # Pairs already being checked, so that recursive schemas terminate.
+        self.seen: Set[Tuple[int, int]] = set()
+
+    def check(self, writer: Schema, reader: Schema, path: str, depth: int = 0) -> None:
+        if depth > MAX_DEPTH:
+            return fresh_stack(self.check, writer, reader, path)
+        writer, reader = unwrap(writer), unwrap(reader)
+        if isinstance(writer, AvroUnion):
+            # Any branch could have been written, so every one must be readable.
+            for branch in writer.schemas:
+                self.check(branch, reader, path, depth + 1)
+        elif isinstance(reader, AvroUnion):
+            for branch in reader.schemas:
+                if matches(writer, branch):
+                    self.check(writer, branch, path, depth + 1)
+                    break
+            else:
+                self.problems.append(
+                    f"{path}: {name_of(writer)} is in no branch of the reader's union."
+                )
+        elif not matches(writer, reader):
+            self.problems.append(
+                f"{path}: {name_of(writer)} cannot be read as {name_of(reader)}."
+            )
+        elif isinstance(writer, AvroRecord) and isinstance(reader, AvroRecord):
+            if (id(writer), id(reader)) not in self.seen:
+                self.seen.add((id(writer), id(reader)))
+                self.record(writer, reader, path, depth)
+        elif isinstance(writer, AvroEnum) and isinstance(reader, AvroEnum):
+            unknown = [s for s in writer.symbols if s not in set(reader.symbols)]
+            if unknown and reader.default is None:
+                self.problems.append(f"{path}: {reader.name} lacks symbols {unknown}.")
+        elif isinstance(writer, AvroArray) and isinstance(reader, AvroArray):
+            self.check(writer.items, reader.items, f"{path}[]", depth + 1)
+        elif isinstance(writer, AvroMap) and isinstance(reader, AvroMap):
+            self.check(writer.values, reader.values, f"{path}{{}}", depth + 1)
+
+    def record(
+        self, writer: AvroRecord, reader: AvroRecord, path: str, depth: int
+    ) -> None:
+        writer_fields = {field.name: field for field in writer.fields}
+        for field in reader.fields:
+            for name in [field.name, *field.aliases]:
+                if name in writer_fields:
+                    self.check(
+                        writer_fields[name].type,
+                        field.type,
+                        f"{path}.{field.name}",
+                        depth + 1,
+                    )
+                    break
+            else:
+                if field.default is MISSING:
+                    self.problems.append(
+                        f"{path}.{field.name}: missing from {writer.name} "
+                        f"and has no default."
+                    )
+
+
+def can_read(writer: Schema, reader: Schema) -> List[str]:
+    """Check whether data written with one schema can be read with another.
+
+    :param writer: The intermediate form schema the data would be written with.
+    :param reader: The intermediate form schema the data would be read with.
+
+    :returns: A description of each incompatibility, if any.
+    """
+    checker = _Checker()
+    checker.check(writer, reader, name_of(unwrap(reader)))
+    return checker.problems
+
+
+def compatible(
+    schema: Schema,
+    versions: Sequence[Schema],
+    level: Compatibility = Compatibility.BACKWARD,
+) -> List[str]:
+    """Check a new schema against the existing versions of its subject.
+
+    :param schema: The new intermediate form schema.
+    :param versions: The existing versions of the subject, oldest first.
+    :param level: Which versions, and in which direction, to check against.
+
+    :returns: A description of each incompatibility, if any.
+    """
+    if level is Compatibility.NONE or not versions:
+        return []
+    if not level.name.endswith("_TRANSITIVE"):
+        versions = versions[-1:]
+
+    problems: List[str] = []
+    for version in versions:
+        if version.fingerprint == schema.fingerprint:
+            # Identical on the wire, so trivially compatible both ways.
+            continue
+        if level.name.startswith(("BACKWARD", "FULL")):
+            problems.extend(can_read(version, schema))
+        if level.name.startswith(("FORWARD", "FULL")):
+            problems.extend(can_read(schema, version))
+    return problems
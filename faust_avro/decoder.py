@@ -0,0 +1,581 @@
+"""
+Compiled avro binary decoders.
+
+A decoder is generated once per (writer schema, reader schema) pair from their
+intermediate forms. Schema resolution is worked out while compiling, so the
+generated code reads the binary form in a single pass and builds reader
+Records (including nested records and union branches) directly, without
+first producing a dict for faust to rebuild the Record from.
+
+Ref: https://avro.apache.org/docs/current/spec.html#Schema+Resolution
+"""
+
+import keyword
+import struct
+from copy import deepcopy
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from faust.utils import codegen
+from fastavro.read import LOGICAL_READERS
+
+from faust_avro.exceptions import CodecException
+from faust_avro.record import LazyRecord, Record
+from faust_avro.schema import (
+    MISSING,
+    STRING,
+    AvroArray,
+    AvroEnum,
+    AvroField,
+    AvroFixed,
+    AvroMap,
+    AvroNested,
+    AvroRecord,
+    AvroUnion,
+    LogicalType,
+    NamedSchema,
+    Primitive,
+    Schema,
+)
+from faust_avro.walk import MAX_DEPTH, fresh_stack
+
+__all__ = ["Buffer", "Decoder", "compile_decoder"]
+
+# Decoders read from anything supporting the buffer protocol, so a payload
+# can be decoded in place from a memoryview, without slicing off its header.
+Buffer = Union[bytes, bytearray, memoryview]
+Decoder = Callable[[Buffer, int], Tuple[Any, int]]
+
+FLOAT = struct.Struct("<f")
+DOUBLE = struct.Struct("<d")
+
+# Writer primitive -> the reader primitives it can be read as.
+PROMOTIONS = {
+    "null": ("null",),
+    "boolean": ("boolean",),
+    "int": ("int", "long", "float", "double"),
+    "long": ("long", "float", "double"),
+    "float": ("float", "double"),
+    "double": ("double",),
+    "bytes": ("bytes", "string"),
+    "string": ("string", "bytes"),
+}
+
+# Primitives which are always the same number of bytes on the wire.
+FIXED_SIZES = {"null": 0, "boolean": 1, "float": 4, "double": 8}
+
+# How many arrays, maps and unions to nest in one generated function, as
+# python allows only 20 statically nested loops per function, and arrays and
+# maps take two each. Those nested deeper are read by functions of their own.
+MAX_NESTING = 5
+
+# Source skipping past a varint, without decoding it.
+SKIP_LONG = ["while buf[pos] & 0x80:", "    pos += 1", "pos += 1"]
+
+
+def read_long(buf: Buffer, pos: int) -> Tuple[int, int]:
+    """Read a zig-zag varint encoded int/long."""
+    b = buf[pos]
+    pos += 1
+    n = b & 0x7F
+    shift = 7
+    while b & 0x80:
+        b = buf[pos]
+        pos += 1
+        n |= (b & 0x7F) << shift
+        shift += 7
+    return (n >> 1) ^ -(n & 1), pos
+
+
+def unwrap(schema: Schema) -> Schema:
+    """Strip away nesting and logical types, down to the schema on the wire."""
+    while isinstance(schema, (AvroNested, LogicalType)):
+        schema = schema.schema
+    return schema
+
+
+def unqualified(name: str) -> str:
+    return name.rsplit(".", 1)[-1]
+
+
+def names_match(writer: NamedSchema, reader: NamedSchema) -> bool:
+    names = {reader.name, unqualified(reader.name), *reader.aliases}
+    return writer.name in names or unqualified(writer.name) in names
+
+
+def matches(writer: Schema, reader: Schema) -> bool:
+    """Can data written as writer be read as reader? (Ignoring unions)."""
+    writer, reader = unwrap(writer), unwrap(reader)
+    if isinstance(writer, Primitive) and isinstance(reader, Primitive):
+        return reader.name in PROMOTIONS[writer.name]
+    elif type(writer) is not type(reader):
+        return False
+    elif isinstance(writer, AvroFixed) and isinstance(reader, AvroFixed):
+        return names_match(writer, reader) and writer.size == reader.size
+    elif isinstance(writer, (AvroRecord, AvroEnum)) and isinstance(reader, NamedSchema):
+        return names_match(writer, reader)
+    return isinstance(writer, (AvroArray, AvroMap))
+
+
+def reader_branch(writer: Schema, reader: Optional[Schema]) -> Optional[Schema]:
+    """The first branch of a reader union which can read writer."""
+    if reader is None:
+        return None
+    union = unwrap(reader)
+    if isinstance(union, AvroUnion):
+        for branch in union.schemas:
+            if matches(writer, branch):
+                return branch
+    elif matches(writer, reader):
+        return reader
+    raise CodecException(f"{writer} cannot be read as {reader}.")
+
+
+def fixed_size(writer: Schema) -> Optional[int]:
+    """The size in bytes of writer on the wire, if it is always the same."""
+    writer = unwrap(writer)
+    if isinstance(writer, Primitive):
+        return FIXED_SIZES.get(writer.name)
+    elif isinstance(writer, AvroFixed):
+        return writer.size
+    return None
+
+
+def call_kwarg(name: str, value: str) -> str:
+    if name.isidentifier() and not keyword.iskeyword(name):
+        return f"{name}={value}"
+    return f"**{{{name!r}: {value}}}"
+
+
+class _Compiler:
+    """Generates the python source for a decoder.
+
+    Each (writer, reader) pair of named records becomes its own function, so
+    that recursive schemas call back into themselves. Everything else is
+    inlined into the function of the record that contains it, up to
+    MAX_NESTING containers deep.
+
+    Compiling recurses through the schema, passing its depth down to carry
+    on from a fresh stack past MAX_DEPTH, as faust_avro.walk describes, and
+    passing down how many containers deep the current function is.
+    """
+
+    def __init__(self) -> None:
+        self.namespace: Dict[str, Any] = dict(
+            CodecException=CodecException,
+            deepcopy=deepcopy,
+            read_long=read_long,
+            unpack_double=DOUBLE.unpack_from,
+            unpack_float=FLOAT.unpack_from,
+        )
+        self.functions: Dict[Tuple[int, int], str] = dict()
+        self.skippers: Dict[int, str] = dict()
+        self.counter = 0
+
+    def unique(self, prefix: str) -> str:
+        self.counter += 1
+        return f"{prefix}_{self.counter}"
+
+    def constant(self, prefix: str, value: Any) -> str:
+        name = self.unique(prefix)
+        self.namespace[name] = value
+        return name
+
+    def long(self, target: str) -> List[str]:
+        """Source reading an int/long into target, inlining the one byte case."""
+        return [
+            f"{target} = buf[pos]",
+            f"if {target} < 0x80:",
+            "    pos += 1",
+            f"    {target} = ({target} >> 1) ^ -({target} & 1)",
+            "else:",
+            f"    {target}, pos = read_long(buf, pos)",
+        ]
+
+    def string(self, target: str, promoted: str) -> List[str]:
+        """Source reading a string or bytes into target."""
+        size = self.unique("size")
+        if promoted == "string":
+            value = f"str(buf[pos:pos + {size}], 'utf-8')"
+        else:
+            value = f"bytes(buf[pos:pos + {size}])"
+        return [*self.long(size), f"{target} = {value}", f"pos += {size}"]
+
+    def compile(self, writer: Schema, reader: Optional[Schema]) -> Decoder:
+        body = self.emit(writer, reader, "value")
+        return codegen.Function(
+            "decode",
+            ["buf", "pos"],
+            [*body, "return value, pos"],
+            globals=self.namespace,
+            locals=self.namespace,
+        )
+
+    def emit(
+        self,
+        writer: Schema,
+        reader: Optional[Schema],
+        target: str,
+        depth: int = 0,
+        nesting: int = 0,
+    ) -> List[str]:
+        """Source lines reading writer from buf at pos into target, as reader."""
+        if depth > MAX_DEPTH:
+            return fresh_stack(self.emit, writer, reader, target, nesting=nesting)
+        while isinstance(writer, AvroNested):
+            writer = writer.schema
+
+        if nesting >= MAX_NESTING and isinstance(
+            writer, (AvroArray, AvroMap, AvroUnion)
+        ):
+            decode = self.constant("decode_nested", self.field(writer, reader, depth))
+            return [f"{target}, pos = {decode}(buf, pos)"]
+        elif isinstance(writer, LogicalType):
+            return self.logical(writer, reader, target, depth, nesting)
+        elif isinstance(writer, AvroUnion):
+            return self.union(writer, reader, target, depth, nesting)
+
+        if reader is not None:
+            reader = reader_branch(writer, reader)
+        if reader is not None:
+            reader = unwrap(reader)
+
+        if isinstance(writer, Primitive):
+            return self.primitive(writer, reader, target)
+        elif isinstance(writer, AvroRecord):
+            return [f"{target}, pos = {self.record(writer, reader, depth)}(buf, pos)"]
+        elif isinstance(writer, AvroEnum):
+            return self.enum(writer, reader, target)
+        elif isinstance(writer, AvroFixed):
+            return [
+                f"{target} = bytes(buf[pos:pos + {writer.size}])",
+                f"pos += {writer.size}",
+            ]
+        elif isinstance(writer, AvroArray):
+            items = reader.items if isinstance(reader, AvroArray) else None
+            item = self.unique("item")
+            return self.blocks(
+                target,
+                "[]",
+                [
+                    *self.emit(writer.items, items, item, depth + 1, nesting + 1),
+                    f"{target}.append({item})",
+                ],
+            )
+        elif isinstance(writer, AvroMap):
+            values = reader.values if isinstance(reader, AvroMap) else None
+            key, value = self.unique("key"), self.unique("value")
+            return self.blocks(
+                target,
+                "{}",
+                [
+                    *self.string(key, "string"),
+                    *self.emit(writer.values, values, value, depth + 1, nesting + 1),
+                    f"{target}[{key}] = {value}",
+                ],
+            )
+        raise CodecException(f"Unable to compile a decoder for {writer}.")
+
+    def primitive(
+        self, writer: Primitive, reader: Optional[Schema], target: str
+    ) -> List[str]:
+        promoted = reader.name if isinstance(reader, Primitive) else writer.name
+        if writer.name == "null":
+            return [f"{target} = None"]
+        elif writer.name == "boolean":
+            return [f"{target} = buf[pos] == 1", "pos += 1"]
+        elif writer.name in ("int", "long"):
+            lines = self.long(target)
+            if promoted in ("float", "double"):
+                lines.append(f"{target} = float({target})")
+            return lines
+        elif writer.name == "float":
+            return [f"{target}, = unpack_float(buf, pos)", "pos += 4"]
+        elif writer.name == "double":
+            return [f"{target}, = unpack_double(buf, pos)", "pos += 8"]
+        elif promoted in ("string", "bytes"):
+            return self.string(target, promoted)
+        raise CodecException(f"Unknown primitive type {writer.name}.")
+
+    def logical(
+        self,
+        writer: LogicalType,
+        reader: Optional[Schema],
+        target: str,
+        depth: int,
+        nesting: int,
+    ) -> List[str]:
+        if reader is not None:
+            reader = reader_branch(writer, reader)
+        lines = self.emit(writer.schema, reader, target, depth + 1, nesting)
+        base = unwrap(writer)
+        base_name = base.name if isinstance(base, Primitive) else "fixed"
+        convert = LOGICAL_READERS.get(f"{base_name}-{writer.logical_type}")
+        if convert is not None:
+            reader_schema = writer if reader is None else reader
+            lines.append(
+                f"{target} = {self.constant('convert', convert)}({target}, "
+                f"{self.constant('writer', writer.to_avro())}, "
+                f"{self.constant('reader', reader_schema.to_avro())})"
+            )
+        return lines
+
+    def union(
+        self,
+        writer: AvroUnion,
+        reader: Optional[Schema],
+        target: str,
+        depth: int,
+        nesting: int,
+    ) -> List[str]:
+        index = self.unique("index")
+        lines = self.long(index)
+        for i, branch in enumerate(writer.schemas):
+            lines.append(f"{'elif' if i else 'if'} {index} == {i}:")
+            try:
+                read_as = reader_branch(branch, reader)
+                lines.extend(
+                    indent(self.emit(branch, read_as, target, depth + 1, nesting + 1))
+                )
+            except CodecException as e:
+                # Only an error if a message actually used this branch.
+                lines.append(f"    raise CodecException({str(e)!r})")
+        lines.append("else:")
+        lines.append(f"    raise CodecException(f'Bad union index {{{index}}}.')")
+        return lines
+
+    def enum(
+        self, writer: AvroEnum, reader: Optional[Schema], target: str
+    ) -> List[str]:
+        symbols: List[Any] = list(writer.symbols)
+        if isinstance(reader, AvroEnum):
+            reader_symbols = set(reader.symbols)
+            default = reader.default if reader.default is not None else MISSING
+            symbols = [s if s in reader_symbols else default for s in symbols]
+
+        index = self.unique("index")
+        lines = [
+            *self.long(index),
+            f"{target} = {self.constant('symbols', tuple(symbols))}[{index}]",
+        ]
+        if MISSING in symbols:
+            lines.append(f"if {target} is {self.constant('missing', MISSING)}:")
+            message = f"{writer.name} symbol unknown to reader."
+            lines.append(f"    raise CodecException({message!r})")
+        return lines
+
+    def blocks(self, target: str, empty: str, item: List[str]) -> List[str]:
+        """Source for reading the blocks of an array or map into target."""
+        count = self.unique("count")
+        return [
+            f"{target} = {empty}",
+            *self.long(count),
+            f"while {count}:",
+            f"    if {count} < 0:",
+            f"        {count} = -{count}",
+            "        _, pos = read_long(buf, pos)",
+            f"    for _ in range({count}):",
+            *indent(item, 2),
+            *indent(self.long(count)),
+        ]
+
+    def record(self, writer: AvroRecord, reader: Optional[Schema], depth: int) -> str:
+        """Compile (once) a named writer/reader record pair into its own function."""
+        key = (id(writer), id(reader))
+        try:
+            return self.functions[key]
+        except KeyError:
+            name = self.functions[key] = self.unique("decode_record")
+
+        reader_fields: Dict[str, AvroField] = dict()
+        if isinstance(reader, AvroRecord):
+            for field in reader.fields:
+                for alias in [field.name, *field.aliases]:
+                    reader_fields.setdefault(alias, field)
+
+        python_type = (
+            reader.resolve_python_type() if isinstance(reader, AvroRecord) else None
+        )
+        lazy = isinstance(python_type, type) and issubclass(python_type, LazyRecord)
+
+        # Names are only ever emitted as reprs, so they can't inject code.
+        body = [f"# {writer.name!r} -> {getattr(reader, 'name', None)!r}"]
+        values: Dict[str, str] = dict()
+        decoders: Dict[str, Decoder] = dict()
+        for field in writer.fields:
+            if reader is None:
+                read_as = AvroField(field.name, None)
+            elif field.name in reader_fields:
+                read_as = reader_fields[field.name]
+            else:
+                # A writer field the reader doesn't know about.
+                body.extend(self.skip(field.type, depth + 1))
+                continue
+
+            if lazy:
+                # Note where the field is, to decode it on first access.
+                target = values[read_as.name] = self.unique("offset")
+                body.append(f"{target} = pos")
+                body.extend(self.skip(field.type, depth + 1))
+                decoders[read_as.name] = self.field(field.type, read_as.type, depth + 1)
+            else:
+                target = values[read_as.name] = self.unique("field")
+                body.extend(self.emit(field.type, read_as.type, target, depth + 1))
+
+        if isinstance(reader, AvroRecord):
+            for field in reader.fields:
+                if field.name in values:
+                    continue
+                elif field.default is MISSING:
+                    raise CodecException(
+                        f"{reader.name}.{field.name} has no default and is "
+                        f"missing from {writer.name}."
+                    )
+                values[field.name] = self.default(field.default)
+
+        if lazy:
+            model = self.constant("Model", python_type)
+            offsets = ", ".join(f"{k!r}: {values.pop(k)}" for k in decoders)
+            defaults = ", ".join(f"{k!r}: {v}" for k, v in values.items())
+            body.append(
+                f"return {model}._from_avro(buf, {{{offsets}}}, "
+                f"{self.constant('decoders', decoders)}, {{{defaults}}}), pos"
+            )
+        elif isinstance(python_type, type) and issubclass(python_type, Record):
+            model = self.constant("Model", python_type)
+            kwargs = ", ".join(call_kwarg(k, v) for k, v in values.items())
+            body.append(f"return {model}({kwargs}), pos")
+        else:
+            items = ", ".join(f"{k!r}: {v}" for k, v in values.items())
+            body.append(f"return {{{items}}}, pos")
+
+        codegen.Function(
+            name, ["buf", "pos"], body, globals=self.namespace, locals=self.namespace
+        )
+        return name
+
+    def field(self, writer: Schema, reader: Optional[Schema], depth: int) -> Decoder:
+        """Compile a function decoding a single value, for the fields of lazy
+        records and containers nested too deep to inline."""
+        return codegen.Function(
+            self.unique("decode_field"),
+            ["buf", "pos"],
+            [*self.emit(writer, reader, "value", depth), "return value, pos"],
+            globals=self.namespace,
+            locals=self.namespace,
+        )
+
+    def skip(self, writer: Schema, depth: int = 0, nesting: int = 0) -> List[str]:
+        """Source lines advancing pos past writer, without building its value."""
+        if depth > MAX_DEPTH:
+            return fresh_stack(self.skip, writer, nesting=nesting)
+        writer = unwrap(writer)
+        size = fixed_size(writer)
+        if size is not None:
+            return [f"pos += {size}"] if size else []
+        elif isinstance(writer, Primitive) and writer.name in ("int", "long"):
+            return SKIP_LONG
+        elif isinstance(writer, Primitive):
+            # Strings and bytes are skipped by their length.
+            length = self.unique("size")
+            return [*self.long(length), f"pos += {length}"]
+        elif isinstance(writer, AvroEnum):
+            return SKIP_LONG
+        elif isinstance(writer, AvroRecord):
+            return [f"pos = {self.skipper(writer, depth)}(buf, pos)"]
+        elif nesting >= MAX_NESTING and isinstance(
+            writer, (AvroArray, AvroMap, AvroUnion)
+        ):
+            skip = self.constant("skip_nested", self.skip_function(writer, depth))
+            return [f"pos = {skip}(buf, pos)"]
+        elif isinstance(writer, AvroUnion):
+            index = self.unique("index")
+            lines = self.long(index)
+            for i, branch in enumerate(writer.schemas):
+                lines.append(f"{'elif' if i else 'if'} {index} == {i}:")
+                lines.extend(
+                    indent(self.skip(branch, depth + 1, nesting + 1) or ["pass"])
+                )
+            return lines
+        elif isinstance(writer, AvroArray):
+            return self.skip_blocks(writer.items, [], depth, nesting)
+        elif isinstance(writer, AvroMap):
+            return self.skip_blocks(writer.values, self.skip(STRING), depth, nesting)
+        raise CodecException(f"Unable to compile a decoder for {writer}.")
+
+    def skip_blocks(
+        self, item: Schema, key: List[str], depth: int, nesting: int
+    ) -> List[str]:
+        """Source skipping the blocks of an array or map.
+
+        Blocks written with their size in bytes are skipped in one step, as
+        are blocks of fixed size items.
+        """
+        count, size = self.unique("count"), self.unique("size")
+        item_size = fixed_size(item)
+        if item_size is not None and not key:
+            skip_items = [f"pos += {count} * {item_size}"]
+        else:
+            skip_items = [
+                f"for _ in range({count}):",
+                *indent(key + self.skip(item, depth + 1, nesting + 1) or ["pass"]),
+            ]
+        return [
+            *self.long(count),
+            f"while {count}:",
+            f"    if {count} < 0:",
+            f"        {size}, pos = read_long(buf, pos)",
+            f"        pos += {size}",
+            "    else:",
+            *indent(skip_items, 2),
+            *indent(self.long(count)),
+        ]
+
+    def skipper(self, writer: AvroRecord, depth: int) -> str:
+        """Compile (once) a function skipping past a named writer record."""
+        try:
+            return self.skippers[id(writer)]
+        except KeyError:
+            name = self.skippers[id(writer)] = self.unique("skip_record")
+
+        body = [f"# {writer.name!r}"]
+        for field in writer.fields:
+            body.extend(self.skip(field.type, depth + 1))
+        body.append("return pos")
+
+        codegen.Function(
+            name, ["buf", "pos"], body, globals=self.namespace, locals=self.namespace
+        )
+        return name
+
+    def skip_function(self, writer: Schema, depth: int) -> Callable[[Buffer, int], int]:
+        """Compile a function skipping past a container nested too deep to inline."""
+        return codegen.Function(
+            self.unique("skip_nested"),
+            ["buf", "pos"],
+            [*(self.skip(writer, depth) or ["pass"]), "return pos"],
+            globals=self.namespace,
+            locals=self.namespace,
+        )
+
+    def default(self, value: Any) -> str:
+        """Source for a reader field's default, copying mutable defaults."""
+        if isinstance(value, (list, dict)):
+            return f"deepcopy({self.constant('default', value)})"
+        return self.constant("default", value)
+
+
+def indent(lines: List[str], level: int = 1) -> List[str]:
+    return [f"{'    ' * level}{line}" for line in lines]
+
+
+def compile_decoder(writer: Schema, reader: Optional[Schema] = None) -> Decoder:
+    """Compile a decoder which reads avro binary data written with one schema as another.
+
+    :param writer: The intermediate form schema the data was written with.
+    :param reader: The intermediate form schema to read the data as. Records
+        backed by a faust_avro.Record are built as that Record. If None,
+        data is read as the writer schema into plain python types.
+
+    :returns: A function of (buffer, position) returning (value, new position).
+    """
+    return _Compiler().compile(writer, reader)
@@ -0,0 +1,354 @@
+"""
+Compiled avro binary encoders.
+
+Rather than walking a value and a schema in lockstep for every message, an
+encoder is generated once from an intermediate form schema. It reads fields
+straight off of Record attributes and appends the avro binary encoding to a
+bytearray, without building intermediate dicts along the way.
+
+Ref: https://avro.apache.org/docs/current/spec.html#binary_encoding
+"""
+
+import collections.abc
+import keyword
+import struct
+from datetime import date, datetime, time
+from decimal import Decimal
+from enum import EnumMeta
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional
+from uuid import UUID
+
+from faust.utils import codegen
+from fastavro.write import LOGICAL_WRITERS
+
+from faust_avro.exceptions import CodecException
+from faust_avro.schema import (
+    AvroArray,
+    AvroEnum,
+    AvroFixed,
+    AvroMap,
+    AvroNested,
+    AvroRecord,
+    AvroUnion,
+    LogicalType,
+    Primitive,
+    Schema,
+)
+from faust_avro.walk import MAX_DEPTH, fresh_stack
+
+__all__ = ["Encoder", "compile_encoder"]
+
+Encoder = Callable[[Any, bytearray], None]
+
+FLOAT = struct.Struct("<f")
+DOUBLE = struct.Struct("<d")
+
+# How many arrays, maps and unions to nest in one generated function, as
+# python allows only 20 statically nested loops per function. Those nested
+# deeper are written by functions of their own.
+MAX_NESTING = 5
+
+# Python types used to pick a union branch for a logical type.
+LOGICAL_PYTHON_TYPES = {
+    "date": date,
+    "time-millis": time,
+    "time-micros": time,
+    "timestamp-millis": datetime,
+    "timestamp-micros": datetime,
+    "uuid": UUID,
+    "decimal": Decimal,
+}
+
+
+def write_long(buf: bytearray, n: int) -> None:
+    """Append a zig-zag varint encoded int/long."""
+    n = (n << 1) ^ (n >> 63)
+    while n > 0x7F:
+        buf.append((n & 0x7F) | 0x80)
+        n >>= 7
+    buf.append(n)
+
+
+def write_bytes(buf: bytearray, b: bytes) -> None:
+    write_long(buf, len(b))
+    buf += b
+
+
+def write_string(buf: bytearray, s: str) -> None:
+    b = s.encode()
+    write_long(buf, len(b))
+    buf += b
+
+
+def unknown_branch(schema: AvroUnion, value: Any) -> CodecException:
+    return CodecException(f"{value!r} does not match any branch of {schema}.")
+
+
+def attribute(name: str) -> str:
+    """Source code to read a field off of a record named v."""
+    if name.isidentifier() and not keyword.iskeyword(name):
+        return f"v.{name}"
+    return f"getattr(v, {name!r})"
+
+
+class _Compiler:
+    """Generates the python source for an encoder.
+
+    Named records become their own functions, so that recursive schemas
+    (eg, a LinkedList) call back into themselves. Everything else is inlined
+    into the function of the record that contains it, up to MAX_NESTING
+    containers deep.
+
+    Like the decoder's, compiling passes its depth down to carry on from a
+    fresh stack past MAX_DEPTH, and how many containers deep it is.
+    """
+
+    def __init__(self) -> None:
+        self.namespace: Dict[str, Any] = dict(
+            Mapping=collections.abc.Mapping,
+            Namespace=SimpleNamespace,
+            datetime=datetime,
+            pack_float=FLOAT.pack,
+            pack_double=DOUBLE.pack,
+            unknown_branch=unknown_branch,
+            write_long=write_long,
+            write_bytes=write_bytes,
+            write_string=write_string,
+        )
+        self.functions: Dict[int, str] = dict()
+        self.counter = 0
+
+    def unique(self, prefix: str) -> str:
+        self.counter += 1
+        return f"{prefix}_{self.counter}"
+
+    def constant(self, prefix: str, value: Any) -> str:
+        name = self.unique(prefix)
+        self.namespace[name] = value
+        return name
+
+    def compile(self, schema: Schema) -> Encoder:
+        body = self.emit(schema, "v")
+        encode = codegen.Function(
+            "encode",
+            ["v", "buf"],
+            body or ["pass"],
+            globals=self.namespace,
+            locals=self.namespace,
+        )
+        return encode
+
+    def record(self, schema: AvroRecord, depth: int) -> str:
+        """Compile (once) a named record into its own function."""
+        try:
+            return self.functions[id(schema)]
+        except KeyError:
+            name = self.functions[id(schema)] = self.unique("encode_record")
+
+        body = [
+            f"# {schema.name!r}",
+            "if isinstance(v, Mapping):",
+            "    v = Namespace(**v)",
+        ]
+        for field in schema.fields:
+            value = self.unique("field")
+            body.append(f"{value} = {attribute(field.name)}")
+            body.extend(self.emit(field.type, value, depth + 1))
+
+        codegen.Function(
+            name, ["v", "buf"], body, globals=self.namespace, locals=self.namespace
+        )
+        return name
+
+    def emit(
+        self, schema: Schema, v: str, depth: int = 0, nesting: int = 0
+    ) -> List[str]:
+        """Source lines appending the encoding of the expression v to buf."""
+        if depth > MAX_DEPTH:
+            return fresh_stack(self.emit, schema, v, nesting=nesting)
+        elif isinstance(schema, Primitive):
+            return self.primitive(schema.name, v)
+        elif isinstance(schema, LogicalType):
+            return self.logical(schema, v, depth, nesting)
+        elif isinstance(schema, AvroNested):
+            return self.emit(schema.schema, v, depth + 1, nesting)
+        elif isinstance(schema, AvroRecord):
+            return [f"{self.record(schema, depth)}({v}, buf)"]
+        elif nesting >= MAX_NESTING and isinstance(
+            schema, (AvroArray, AvroMap, AvroUnion)
+        ):
+            return [f"{self.nested(schema, depth)}({v}, buf)"]
+        elif isinstance(schema, AvroEnum):
+            return self.enum(schema, v)
+        elif isinstance(schema, AvroFixed):
+            return [f"buf += {v}"]
+        elif isinstance(schema, AvroArray):
+            item = self.unique("item")
+            return [
+                f"if {v}:",
+                f"    write_long(buf, len({v}))",
+                f"    for {item} in {v}:",
+                *indent(
+                    self.emit(schema.items, item, depth + 1, nesting + 1) or ["pass"], 2
+                ),
+                "buf.append(0)",
+            ]
+        elif isinstance(schema, AvroMap):
+            key, value = self.unique("key"), self.unique("value")
+            return [
+                f"if {v}:",
+                f"    write_long(buf, len({v}))",
+                f"    for {key}, {value} in {v}.items():",
+                f"        write_string(buf, {key})",
+                *indent(self.emit(schema.values, value, depth + 1, nesting + 1), 2),
+                "buf.append(0)",
+            ]
+        elif isinstance(schema, AvroUnion):
+            return self.union(schema, v, depth, nesting)
+        raise CodecException(f"Unable to compile an encoder for {schema}.")
+
+    def primitive(self, name: str, v: str) -> List[str]:
+        if name == "null":
+            return []
+        elif name == "boolean":
+            return [f"buf.append(1 if {v} else 0)"]
+        elif name in ("int", "long"):
+            return [f"write_long(buf, {v})"]
+        elif name == "float":
+            return [f"buf += pack_float({v})"]
+        elif name == "double":
+            return [f"buf += pack_double({v})"]
+        elif name == "bytes":
+            return [f"write_bytes(buf, {v})"]
+        elif name == "string":
+            return [f"write_string(buf, {v})"]
+        raise CodecException(f"Unknown primitive type {name}.")
+
+    def nested(self, schema: Schema, depth: int) -> str:
+        """Compile a function encoding a container nested too deep to inline."""
+        encode = codegen.Function(
+            self.unique("encode_nested"),
+            ["v", "buf"],
+            self.emit(schema, "v", depth) or ["pass"],
+            globals=self.namespace,
+            locals=self.namespace,
+        )
+        return self.constant("encode_nested", encode)
+
+    def logical(
+        self, schema: LogicalType, v: str, depth: int, nesting: int
+    ) -> List[str]:
+        base = schema.schema
+        while isinstance(base, AvroNested):
+            base = base.schema
+        if isinstance(base, Primitive):
+            base_name = base.name
+        else:
+            base_name = "fixed" if isinstance(base, AvroFixed) else ""
+
+        prepare = LOGICAL_WRITERS.get(f"{base_name}-{schema.logical_type}")
+        if prepare is None:
+            # Unknown logical types are written as their underlying type.
+            return self.emit(schema.schema, v, depth + 1, nesting)
+
+        prepared = self.unique("prepared")
+        return [
+            f"{prepared} = {self.constant('prepare', prepare)}"
+            f"({v}, {self.constant('schema', schema.to_avro())})",
+            *self.emit(schema.schema, prepared, depth + 1, nesting),
+        ]
+
+    def enum(self, schema: AvroEnum, v: str) -> List[str]:
+        index: Dict[Any, int] = {s: i for i, s in enumerate(schema.symbols)}
+        python_type = schema.resolve_python_type()
+        if isinstance(python_type, EnumMeta):
+            for member in python_type:  # type: ignore
+                if member.name in index:
+                    index.setdefault(member, index[member.name])
+        return [f"write_long(buf, {self.constant('symbols', index)}[{v}])"]
+
+    def union(self, schema: AvroUnion, v: str, depth: int, nesting: int) -> List[str]:
+        branches = list(schema.schemas)
+        lines: List[str] = []
+        # Exact matches win over lenient ones (eg, an int for a double), so
+        # that Union[int, float] keeps ints as longs and floats as doubles.
+        for check in (self.exact, self.lenient):
+            for index, branch in enumerate(branches):
+                test = check(branch, v)
+                if test is None:
+                    continue
+                lines.append(f"{'elif' if lines else 'if'} {test}:")
+                if index < 64:
+                    # Zig-zag encoding of small positive ints is a single byte.
+                    lines.append(f"    buf.append({index << 1})")
+                else:
+                    lines.append(f"    write_long(buf, {index})")
+                lines.extend(indent(self.emit(branch, v, depth + 1, nesting + 1), 1))
+        lines.append("else:")
+        lines.append(f"    raise unknown_branch({self.constant('union', schema)}, {v})")
+        return lines
+
+    def exact(self, schema: Schema, v: str) -> Optional[str]:
+        """Source for a test that v is exactly the python type of schema."""
+        if isinstance(schema, AvroNested):
+            return self.exact(schema.schema, v)
+        elif isinstance(schema, Primitive):
+            return {
+                "null": f"{v} is None",
+                "boolean": f"isinstance({v}, bool)",
+                "int": f"isinstance({v}, int) and {v}.__class__ is not bool",
+                "long": f"isinstance({v}, int) and {v}.__class__ is not bool",
+                "float": f"isinstance({v}, float)",
+                "double": f"isinstance({v}, float)",
+                "bytes": f"isinstance({v}, bytes)",
+                "string": f"isinstance({v}, str)",
+            }[schema.name]
+        elif isinstance(schema, LogicalType):
+            python_type = LOGICAL_PYTHON_TYPES.get(schema.logical_type)
+            if python_type is None:
+                return self.exact(schema.schema, v)
+            name = self.constant("logical", python_type)
+            if python_type is date:
+                return f"isinstance({v}, {name}) and not isinstance({v}, datetime)"
+            return f"isinstance({v}, {name})"
+        elif isinstance(schema, (AvroRecord, AvroEnum)):
+            python_type = schema.resolve_python_type()
+            if isinstance(python_type, type):
+                return f"isinstance({v}, {self.constant('named', python_type)})"
+            return None
+        elif isinstance(schema, AvroFixed):
+            return f"isinstance({v}, bytes) and len({v}) == {schema.size}"
+        elif isinstance(schema, AvroArray):
+            return f"isinstance({v}, (list, tuple, set, frozenset))"
+        elif isinstance(schema, AvroMap):
+            return f"isinstance({v}, Mapping)"
+        return None
+
+    def lenient(self, schema: Schema, v: str) -> Optional[str]:
+        """Source for a test that v can be encoded as schema, if not exactly."""
+        if isinstance(schema, AvroNested):
+            return self.lenient(schema.schema, v)
+        elif isinstance(schema, Primitive) and schema.name in ("float", "double"):
+            return f"isinstance({v}, int) and {v}.__class__ is not bool"
+        elif isinstance(schema, LogicalType):
+            return self.exact(schema.schema, v)
+        elif isinstance(schema, AvroRecord):
+            return f"isinstance({v}, Mapping)"
+        elif isinstance(schema, AvroEnum):
+            return f"isinstance({v}, str) and {v} in {list(schema.symbols)!r}"
+        return None
+
+
+def indent(lines: List[str], level: int) -> List[str]:
+    return [f"{'    ' * level}{line}" for line in lines]
+
+
+def compile_encoder(schema: Schema) -> Encoder:
+    """Compile an encoder which appends the avro binary form of a value to a buffer.
+
+    :param schema: The intermediate form schema of the values to be encoded.
+
+    :returns: A function of (value, buffer) which appends value to buffer.
+    """
+    return _Compiler().compile(schema)
@@ -1,4 +1,9 @@
-__all__ = ["SchemaException", "UnknownTypeError", "SchemaAlreadyDefinedError"]
+__all__ = [
+    "SchemaException",
+    "UnknownTypeError",
+    "SchemaAlreadyDefinedError",
+    "InvalidNameError",
+]
 
 
 class SchemaException(Exception):
@@ -15,3 +20,7 @@ class SchemaAlreadyDefinedError(SchemaException):
 
 class UnknownTypeError(SchemaException):
     """The given type does not match any known or user-defined avro type."""
+
+
+class InvalidNameError(SchemaException):
+    """The given name is not a valid avro name."""
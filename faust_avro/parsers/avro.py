@@ -1,7 +1,8 @@
 import collections.abc
-from typing import Any, Dict, Iterable, Optional
+import re
+from typing import Any, Dict, Iterable, Optional, Pattern
 
-from faust_avro.exceptions import UnknownTypeError
+from faust_avro.exceptions import InvalidNameError, UnknownTypeError
 from faust_avro.schema import (
     AvroArray,
     AvroEnum,
@@ -12,42 +13,81 @@ from faust_avro.schema import (
     AvroRecord,
     AvroSchemaT,
     AvroUnion,
+    DecimalLogicalType,
     LogicalType,
     Schema,
 )
+from faust_avro.walk import MAX_DEPTH, fresh_stack
 
+# Ref: https://avro.apache.org/docs/current/spec.html#names
+NAME = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+FULLNAME = re.compile(r"[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*")
 
-def parse(registry: Any, schema: AvroSchemaT) -> Schema:
+
+def parse(registry: Any, schema: AvroSchemaT, depth: int = 0) -> Schema:
     """Parse a json-parsed avro schema into intermediate form.
 
     Ref: https://avro.apache.org/docs/current/spec.html#schemas"""
-    if isinstance(schema, str):
+    if depth > MAX_DEPTH:
+        return fresh_stack(parse, registry, schema)
+    elif isinstance(schema, str):
         if schema in registry:
             return registry[schema]
     elif isinstance(schema, collections.abc.Sequence):
-        return AvroUnion(schemas=[parse(registry, s) for s in schema])
+        return AvroUnion(schemas=[parse(registry, s, depth + 1) for s in schema])
     elif isinstance(schema, collections.abc.Mapping):
-        return parse_logical_type(registry, **schema)
+        return parse_logical_type(registry, depth, **schema)
 
     raise UnknownTypeError(schema)
 
 
-def parse_logical_type(registry: Any, **kwargs: Any) -> Schema:
+def parse_logical_type(registry: Any, depth: int, **kwargs: Any) -> Schema:
     """Parse a possible logical type in addition to the complex schema."""
     logical_type = kwargs.pop("logicalType", None)
-    schema = parse_complex(registry, **kwargs)
-    if logical_type is not None:
+    # Decimal attributes belong to the logical type, not the underlying one.
+    precision = kwargs.pop("precision", None)
+    scale = kwargs.pop("scale", None)
+    schema = parse_complex(registry, depth, **kwargs)
+    if logical_type == "decimal" and precision is not None:
+        schema = DecimalLogicalType(
+            schema=schema, logical_type=logical_type, precision=precision, scale=scale
+        )
+    elif logical_type is not None:
         schema = LogicalType(schema=schema, logical_type=logical_type)
     return schema
 
 
-def parse_record_field(registry: Any, *, type, **kwargs: Any) -> AvroField:
+def check_name(name: Any, pattern: Pattern[str] = FULLNAME) -> None:
+    """Reject invalid names, which could otherwise end up in generated code."""
+    if not isinstance(name, str) or not pattern.fullmatch(name):
+        raise InvalidNameError(name)
+
+
+def check_names(
+    name: Any = None,
+    namespace: Optional[str] = None,
+    aliases: Iterable[str] = (),
+    **_: Any,
+) -> None:
+    """Check the names of a named schema."""
+    check_name(name)
+    if namespace:
+        check_name(namespace)
+    for alias in aliases:
+        check_name(alias)
+
+
+def parse_record_field(
+    registry: Any, depth: int, *, type: AvroSchemaT, **kwargs: Any
+) -> AvroField:
     """Helper function to parse the type of a record field."""
-    return AvroField(type=parse(registry, type), **kwargs)
+    check_name(kwargs.get("name"), NAME)
+    return AvroField(type=parse(registry, type, depth + 1), **kwargs)
 
 
 def parse_complex(
     registry: Any,
+    depth: int,
     *,
     type: AvroSchemaT,
     fields: Iterable[Dict[str, AvroSchemaT]] = (),
@@ -58,22 +98,26 @@ def parse_complex(
     """Helper function to parse one of the avro complex record types.
 
     Ref: https://avro.apache.org/docs/current/spec.html#schema_complex"""
+    if type in ("record", "enum", "fixed"):
+        check_names(**kwargs)
+
     if type == "record":
         # Define the record early, so that it can reference itself by name
         # for recursive definitions (eg, LinkedList).
         schema = registry.add(AvroRecord(**kwargs))
-        schema.fields = [parse_record_field(registry, **f) for f in fields]
+        schema.fields = [parse_record_field(registry, depth, **f) for f in fields]
+        schema.invalidate()
     elif type == "enum":
         schema = registry.add(AvroEnum(**kwargs))
     elif type == "array":
-        schema = AvroArray(items=parse(registry, items))
+        schema = AvroArray(items=parse(registry, items, depth + 1))
     elif type == "map":
-        schema = AvroMap(values=parse(registry, values))
+        schema = AvroMap(values=parse(registry, values, depth + 1))
     elif type == "fixed":
         schema = registry.add(AvroFixed(**kwargs))
     elif isinstance(type, dict):
         # For the outer dict in: `{"type": {"type": whatever}}`
-        schema = AvroNested(schema=parse(registry, type))
+        schema = AvroNested(schema=parse(registry, type, depth + 1))
     elif type in registry:
         # For the inner dict in: `{"type": {"type": whatever}}`
         schema = AvroNested(schema=registry[type])
@@ -26,36 +26,41 @@ from faust_avro.schema import (
     Schema,
 )
 from faust_avro.types import datetime_millis, time_millis
+from faust_avro.walk import MAX_DEPTH, fresh_stack
 
 LOGICAL_TYPES = (date, time, time_millis, datetime, datetime_millis, UUID)
 
 
-def parse(registry: Any, model: Any, namespace="") -> Schema:
+def parse(registry: Any, model: Any, namespace="", depth: int = 0) -> Schema:
     """Parse a faust record into an avro schema."""
+    if depth > MAX_DEPTH:
+        return fresh_stack(parse, registry, model, namespace)
 
     origin = getattr(model, "__origin__", None)
 
     if model in registry:
         schema = registry[model]
     elif isinstance(model, type) and issubclass(model, Record):
-        schema = parse_record(registry, model, namespace)
+        schema = parse_record(registry, model, namespace, depth)
     elif model in LOGICAL_TYPES:
         schema = parse_logical(registry, model, namespace)
     elif isinstance(model, EnumMeta):
         schema = parse_enum(registry, model, namespace)
     elif origin == Union:
-        schema = parse_union(registry, model, namespace)
+        schema = parse_union(registry, model, namespace, depth)
     elif origin and issubclass(origin, collections.abc.Sequence):
-        schema = parse_array(registry, model, namespace)
+        schema = parse_array(registry, model, namespace, depth)
     elif origin and issubclass(origin, collections.abc.Mapping):
-        schema = parse_mapping(registry, model, namespace)
+        schema = parse_mapping(registry, model, namespace, depth)
     else:
         raise UnknownTypeError(f"No avro type known for {model}.")
 
     return schema
 
 
-def parse_record(registry: Any, model: Type[Record], namespace: str) -> Schema:
+def parse_record(
+    registry: Any, model: Type[Record], namespace: str, depth: int
+) -> Schema:
     """Parse a faust record into an avro schema."""
     record = registry.add(
         AvroRecord(
@@ -66,13 +71,16 @@ def parse_record(registry: Any, model: Type[Record], namespace: str) -> Schema:
         )
     )
     record.fields = [
-        parse_field(registry, getattr(model, field), namespace)
+        parse_field(registry, getattr(model, field), namespace, depth)
         for field in model._options.fields
     ]
+    record.invalidate()
     return record
 
 
-def parse_field(registry: Any, model: FieldDescriptor, namespace: str) -> Schema:
+def parse_field(
+    registry: Any, model: FieldDescriptor, namespace: str, depth: int
+) -> AvroField:
     """Parse a faust record's fields into avro fields."""
     if isinstance(model, DecimalField):
         if model.max_digits is not None or model.max_decimal_places is not None:
@@ -84,7 +92,7 @@ def parse_field(registry: Any, model: FieldDescriptor, namespace: str) -> Schema
             schema=BYTES, logical_type="decimal", precision=precision, scale=scale
         )
     else:
-        schema = parse(registry, model.type, namespace)
+        schema = parse(registry, model.type, namespace, depth + 1)
 
     if model.required:
         return AvroField(model.field, schema)
@@ -104,11 +112,12 @@ def parse_enum(registry: Any, model: EnumMeta, namespace: str) -> Schema:
             aliases=[model.__name__],
             doc=model.__doc__,
             symbols=list(model.__members__.keys()),
+            python_type=model,
         )
     )
 
 
-def parse_union(registry: Any, model: Any, namespace: str) -> Schema:
+def parse_union(registry: Any, model: Any, namespace: str, depth: int) -> Schema:
     """Parse a python type hint union into an avro union.
 
     Note: due to how avro works with defaults, if None is part of a union,
@@ -119,15 +128,17 @@ def parse_union(registry: Any, model: Any, namespace: str) -> Schema:
     args = model.__args__
     if type(None) in args:
         args = funcy.distinct([type(None), *args])
-    return AvroUnion(schemas=[parse(registry, schema, namespace) for schema in args])
+    return AvroUnion(
+        schemas=[parse(registry, schema, namespace, depth + 1) for schema in args]
+    )
 
 
-def parse_array(registry: Any, model: Any, namespace: str) -> Schema:
+def parse_array(registry: Any, model: Any, namespace: str, depth: int) -> Schema:
     """Parse a python sequence into an avro array type."""
-    return AvroArray(items=parse(registry, model.__args__[0], namespace))
+    return AvroArray(items=parse(registry, model.__args__[0], namespace, depth + 1))
 
 
-def parse_mapping(registry: Any, model: Any, namespace: str) -> Schema:
+def parse_mapping(registry: Any, model: Any, namespace: str, depth: int) -> Schema:
     """Parse a python mapping into an avro map type.
 
     :raises:
@@ -137,7 +148,7 @@ def parse_mapping(registry: Any, model: Any, namespace: str) -> Schema:
     # Avro maps require keys to be strings.
     if not issubclass(key, str):
         raise TypeError(f"{model} does not have string-like keys.")
-    return AvroMap(values=parse(registry, value, namespace))
+    return AvroMap(values=parse(registry, value, namespace, depth + 1))
 
 
 LOGICAL = {
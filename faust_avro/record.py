@@ -1,9 +1,36 @@
-from typing import Any, Callable, ClassVar, Dict, Iterable, Optional, cast
+import json
+import types
+import weakref
+from copy import deepcopy
+from datetime import date, time
+from decimal import Decimal
+from enum import Enum
+from typing import (
+    Any,
+    Callable,
+    ClassVar,
+    Dict,
+    Iterable,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Type,
+    cast,
+)
+from uuid import UUID
 
 import faust
+from faust.types.codecs import CodecArg
 from faust.utils import codegen
 from typing_inspect import is_union_type
 
+from faust_avro.encoder import Encoder, compile_encoder
+
+# The parser imports Record from here, and is itself imported first (through
+# the registry), so is still being loaded now. Only its module is imported,
+# to look parse up on once both are loaded.
+from faust_avro.parsers import faust as faust_parser
+
 
 def faust_annotate(data):
     # Translate from avro's named union records which returns (branch name, value)
@@ -31,19 +58,68 @@ def faust_annotate(data):
         return data
 
 
+# Marks a field which is missing from a record's __dict__, as None is a value.
+MISSING = object()
+
+# Field values which can't be changed in place, so needn't be copied to tell
+# whether they have changed.
+IMMUTABLE = (str, bytes, int, float, type(None), Decimal, date, time, UUID, Enum)
+
+
+def snapshot(value: Any) -> Any:
+    """A copy of value as it is now, unless it can't change anyway."""
+    return value if isinstance(value, IMMUTABLE) else deepcopy(value)
+
+
+class AvroSource(NamedTuple):
+    """The avro payload a record was decoded from."""
+
+    schema_id: int
+    payload: bytes
+    # Snapshots of the record's fields as decoded, to tell if it has changed.
+    values: Dict[str, Any]
+
+
+class AvroForms:
+    """The forms of a Record's avro schema, as parsed into one registry."""
+
+    def __init__(self, schema: Any) -> None:
+        self.schema = schema
+        self.dict: Dict[str, Any] = schema.to_avro()
+        self.json = json.dumps(self.dict)
+        self._encoder: Optional[Encoder] = None
+
+    @property
+    def encoder(self) -> Encoder:
+        """The schema's compiled encoder, shared by every codec of the Record."""
+        if self._encoder is None:
+            self._encoder = compile_encoder(self.schema)
+        return self._encoder
+
+
 class Record(faust.Record, abstract=True):
     _avro_name: ClassVar[str]
     _avro_aliases: ClassVar[Iterable[str]]
+    # Whether decoded records remember their payload, to forward it unchanged.
+    _avro_forward: ClassVar[bool] = False
+    # Per class, rather than inherited, see _avro_forms and project.
+    _avro_forms_cache: ClassVar[Dict[int, AvroForms]]
+    _avro_projections: ClassVar[Dict[Tuple[str, ...], Type["Record"]]]
 
     def __init_subclass__(
         cls,
         avro_name: str = None,
         avro_aliases: Optional[Iterable[str]] = None,
+        avro_forward: Optional[bool] = None,
         **kwargs,
     ):
         super().__init_subclass__(**kwargs)
         cls._avro_name = avro_name or f"{cls.__module__}.{cls.__name__}"
         cls._avro_aliases = avro_aliases or [cls.__name__]
+        if avro_forward is not None:
+            cls._avro_forward = avro_forward
+        cls._avro_forms_cache = dict()
+        cls._avro_projections = dict()
 
     # Modify the translation of input fields in order to change
     # from fastavro's schemaless reader's union return ('type', ...)
@@ -74,9 +150,191 @@ class Record(faust.Record, abstract=True):
             ),
         )
 
+    def dumps(self, *, serializer: CodecArg = None) -> bytes:
+        """Serialize the record, handing avro codecs the record itself.
+
+        faust passes codecs the to_representation() dict of a record. Avro
+        codecs encode straight from the record's attributes instead."""
+        from faust_avro.serializers import Codec
+
+        codec = serializer or self._options.serializer
+        if isinstance(codec, Codec):
+            return codec.dumps(self)
+        return super().dumps(serializer=serializer)
+
+    def _set_avro_source(self, schema_id: int, payload: bytes) -> None:
+        self.__dict__["__avro_source__"] = AvroSource(
+            schema_id, payload, self._avro_values()
+        )
+
+    def _avro_values(self) -> Dict[str, Any]:
+        return {
+            field: snapshot(self.__dict__[field])
+            for field in self._options.fields
+            if field in self.__dict__
+        }
+
+    def _avro_source(self) -> Optional[AvroSource]:
+        """The payload this record was decoded from, if it is unchanged since.
+
+        Only records of classes defined with avro_forward=True remember it.
+        Immutable fields are compared by identity, and the rest (lists, maps
+        and nested records, changed in place or not) to a copy as decoded.
+        """
+        source = self.__dict__.get("__avro_source__")
+        if source is None:
+            return None
+        for field in self._options.fields:
+            value = dict.get(self.__dict__, field, MISSING)
+            decoded = source.values.get(field, MISSING)
+            if value is not decoded and (
+                isinstance(decoded, IMMUTABLE) or value != decoded
+            ):
+                return None
+        return source
+
+    @classmethod
+    def project(cls, *fields: str) -> Type["Record"]:
+        """A Record of only some of this Record's fields, for reading.
+
+        The projection shares this Record's avro name and aliases, so it can
+        read data written as this Record, skipping over the other fields.
+
+        :param fields: The names of the fields to keep.
+
+        :returns: A new Record class with just those fields.
+        """
+        try:
+            return cls._avro_projections[fields]
+        except KeyError:
+            pass
+
+        unknown = set(fields) - set(cls._options.fields)
+        if unknown:
+            raise ValueError(f"{cls.__name__} has no fields {sorted(unknown)}.")
+
+        def body(ns: Dict[str, Any]) -> None:
+            ns["__annotations__"] = {f: cls._options.fields[f] for f in fields}
+            ns["__module__"] = cls.__module__
+            ns["__qualname__"] = f"{cls.__qualname__}[{', '.join(fields)}]"
+            ns["__doc__"] = cls.__doc__
+            for field in fields:
+                descriptor = cls._options.descriptors[field]
+                if field in cls._options.defaults:
+                    ns[field] = cls._options.defaults[field]
+                elif cls.__dict__.get(field) is descriptor:
+                    ns[field] = descriptor.clone(model=None)
+
+        projection = cls._avro_projections[fields] = cast(
+            Type[Record],
+            types.new_class(
+                cls.__name__,
+                (Record,),
+                dict(avro_name=cls._avro_name, avro_aliases=cls._avro_aliases),
+                body,
+            ),
+        )
+        return projection
+
+    @classmethod
+    def _avro_forms(cls, registry) -> AvroForms:
+        """This Record's avro schema as parsed into registry, computed once.
+
+        The cache is kept on the class, so it goes when the class does, and
+        holds no reference to the registry, so it goes when the registry does.
+        """
+        key = id(registry)
+        forms = cls._avro_forms_cache.get(key)
+        # The registry maps the class to its schema, unless since rolled back.
+        if forms is None or registry.get(cls) is not forms.schema:
+            if forms is None:
+                weakref.finalize(registry, cls._avro_forms_cache.pop, key, None)
+            forms = cls._avro_forms_cache[key] = AvroForms(
+                faust_parser.parse(registry, cls)
+            )
+        return forms
+
     @classmethod
     def to_avro(cls, registry) -> Dict[str, Any]:
-        from faust_avro.parsers.faust import parse
+        """This Record's avro schema, which must not be modified, as it is shared."""
+        return cls._avro_forms(registry).dict
+
+
+class LazyFields(dict):
+    """The fields of a LazyRecord, decoded from avro when first looked up."""
+
+    __slots__ = ("buf", "offsets", "decoders", "decoded")
+
+    # The payload, until fully decoded.
+    buf: Any
+    # The position in buf of each field still to decode, and its decoder.
+    offsets: Dict[str, int]
+    decoders: Dict[str, Callable[[Any, int], Tuple[Any, int]]]
+    # Snapshots of the fields as decoded, if the record forwards its payload.
+    decoded: Optional[Dict[str, Any]]
+
+    def __missing__(self, field: str) -> Any:
+        try:
+            pos = self.offsets.pop(field)
+        except KeyError:
+            raise KeyError(field) from None
+        value, _ = self.decoders[field](self.buf, pos)
+        self[field] = value
+        if self.decoded is not None:
+            self.decoded[field] = snapshot(value)
+        if not self.offsets:
+            # Fully decoded, so the payload is no longer needed.
+            self.buf = None
+        return value
+
+
+class LazyRecord(Record, abstract=True):
+    """A Record which, when decoded from avro, decodes each field on first access.
+
+    Records which are only filtered on a field or two, routed by key or
+    forwarded never pay to decode the rest. Until fully decoded, a record
+    holds onto the payload it was decoded from.
+    """
+
+    @classmethod
+    def _from_avro(
+        cls,
+        buf: Any,
+        offsets: Dict[str, int],
+        decoders: Dict[str, Callable[[Any, int], Tuple[Any, int]]],
+        values: Dict[str, Any],
+    ) -> "LazyRecord":
+        """Build a record from the offsets of its fields in an avro payload.
+
+        :param buf: The payload.
+        :param offsets: The position in buf of each field still to decode.
+        :param decoders: The decoder for each field in offsets.
+        :param values: Fields with values already, eg reader defaults.
+        """
+        fields = LazyFields(values, __evaluated_fields__=set())
+        fields.buf, fields.offsets, fields.decoders = buf, offsets, decoders
+        fields.decoded = None
+        if cls._avro_forward:
+            fields.decoded = {field: snapshot(value) for field, value in values.items()}
+        record = cls.__new__(cls)
+        record.__dict__ = fields
+        if hasattr(cls, "__post_init__"):
+            record.__post_init__()  # type: ignore
+        return record
+
+    def _avro_values(self) -> Dict[str, Any]:
+        # Fields decoded later on are added to this as they are.
+        decoded = cast(LazyFields, self.__dict__).decoded
+        return dict() if decoded is None else decoded
+
+    def _decode_all(self) -> None:
+        for field in self._options.fields:
+            getattr(self, field)
+
+    def _humanize(self) -> str:
+        self._decode_all()
+        return super()._humanize()
 
-        avro_schema = parse(registry, cls)
-        return avro_schema.to_avro()
+    def __getstate__(self) -> Dict[str, Any]:
+        self._decode_all()
+        return dict(self.__dict__)
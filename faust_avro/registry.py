@@ -1,14 +1,16 @@
-from typing import Any
+from typing import Any, List, Optional, Tuple
 
 from faust_avro.exceptions import SchemaAlreadyDefinedError, SchemaException
 from faust_avro.parsers.avro import parse
-from faust_avro.schema import PRIMITIVES, AvroSchemaT, NamedSchema, Schema
+from faust_avro.schema import MISSING, PRIMITIVES, AvroSchemaT, NamedSchema, Schema
 
 
 class Registry(dict):
     """A write-once schema registry."""
 
     def __init__(self, *args, **kwargs):
+        # While parsing, every write is journaled so it can be undone.
+        self._journal: Optional[List[Tuple[Any, Any]]] = None
         super().__init__(*args, **kwargs)
         for primitive in reversed(PRIMITIVES):
             try:
@@ -20,10 +22,19 @@ class Registry(dict):
     def __setitem__(self, key: Any, value: Schema) -> None:
         """Write-once semantics, ignoring no-op writes."""
 
-        if key in self and self[key] != value:
+        previous = self.get(key, MISSING)
+        if previous is value:
+            return
+        # Comparing fingerprints, rather than schemas, avoids walking the
+        # whole of both schemas on every write.
+        if (
+            previous is not MISSING
+            and previous.structural_fingerprint != value.structural_fingerprint
+        ):
             raise SchemaAlreadyDefinedError(key)
-        else:
-            super().__setitem__(key, value)
+        if self._journal is not None:
+            self._journal.append((key, previous))
+        super().__setitem__(key, value)
 
     def add(self, schema: NamedSchema) -> Schema:
         """Add a schema and all its aliases and type to the registry."""
@@ -31,6 +42,7 @@ class Registry(dict):
         for name in [schema.name, *getattr(schema, "aliases", ())]:
             self[name] = schema
 
+        # Only a python type already known, as resolving one can be slow.
         if schema.python_type is not None:
             self[schema.python_type] = schema
 
@@ -39,10 +51,21 @@ class Registry(dict):
     def parse(self, schema: AvroSchemaT) -> Schema:
         """Parse a python type or avro json schema definition into intermediate form."""
 
-        previous = self.copy()
+        if self._journal is not None:
+            # Part of an outer parse, which undoes everything on failure.
+            return parse(self, schema)
+
+        self._journal = []
         try:
             return parse(self, schema)
         except SchemaException:
-            self.clear()
-            self.update(previous)
+            # Undo the writes in reverse, so a key written twice ends up as
+            # it was before either.
+            for key, previous in reversed(self._journal):
+                if previous is MISSING:
+                    super().__delitem__(key)
+                else:
+                    super().__setitem__(key, previous)
             raise
+        finally:
+            self._journal = None
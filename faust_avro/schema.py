@@ -9,14 +9,16 @@ from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
 from enum import Enum
 from importlib import import_module
-from typing import Any, Iterable, List, Optional, Set
+from typing import Any, Dict, Iterable, List, Optional, Set
 
 from faust_avro.types import float32, int32
+from faust_avro.walk import MAX_DEPTH, dumps, fresh_stack
 
 __all__ = [
     # Types
     "AvroSchemaT",
     "VisitedT",
+    "NamesT",
     # Classes
     "AvroRecord",
     "AvroEnum",
@@ -31,6 +33,8 @@ __all__ = [
     "Schema",
     # Constants
     "PRIMITIVES",
+    # Functions
+    "fingerprint",
 ]
 
 
@@ -41,6 +45,25 @@ MISSING = object()
 # AvroSchemaT = Union[str, List["AvroSchemaT"], Dict[str, "AvroSchemaT"]]
 AvroSchemaT = Any
 VisitedT = Set[str]
+# The full names given to named schemas so far, by id.
+NamesT = Dict[int, str]
+
+# https://avro.apache.org/docs/current/spec.html#schema_fingerprints
+EMPTY = 0xC15D213AA4D7A795
+FINGERPRINT_TABLE: List[int] = []
+for i in range(256):
+    fp = i
+    for _ in range(8):
+        fp = (fp >> 1) ^ (EMPTY & -(fp & 1))
+    FINGERPRINT_TABLE.append(fp)
+
+
+def fingerprint(data: bytes) -> int:
+    """The 64-bit CRC-64-AVRO (Rabin) fingerprint of some bytes."""
+    fp = EMPTY
+    for b in data:
+        fp = (fp >> 8) ^ FINGERPRINT_TABLE[(fp ^ b) & 0xFF]
+    return fp
 
 
 @dataclass  # type: ignore
@@ -63,18 +86,76 @@ class Schema(ABC):
             raise ImportError(f"{path} not found.") from e
 
     @abstractmethod
-    def _to_avro(self, visited: VisitedT) -> AvroSchemaT:
+    def _to_avro(self, visited: VisitedT, *, depth: int = 0) -> AvroSchemaT:
         """The implementation of intermediate->avro."""
         # VisitedT is used to prevent infinite recursion. The first time a
         # schema is getting dumped by _to_avro, it should be dumped in full
         # and then visited should be updated to include that schema by name,
         # so that if it is seen again it is dumped as a named type.
+        #
+        # depth is how deeply nested the schema is, see faust_avro.walk.
 
     def to_avro(self) -> AvroSchemaT:
         """Return an avro str/list/dict schema for this intermediate schema."""
         visited: VisitedT = set()
         return self._to_avro(visited)
 
+    def invalidate(self) -> None:
+        """Forget the cached canonical form and fingerprints, after a change.
+
+        Schemas are changed in place while parsing, eg filling in the fields
+        of a record after it was registered, for recursion. Only this schema's
+        own forms are forgotten, not those of any schema containing it.
+        """
+        self.__dict__.pop("_canonical_form", None)
+        self.__dict__.pop("_fingerprint", None)
+        self.__dict__.pop("_structural_fingerprint", None)
+
+    @abstractmethod
+    def _canonical(
+        self, names: NamesT, namespace: str, *, depth: int = 0
+    ) -> AvroSchemaT:
+        """The implementation of intermediate->canonical form, within a namespace."""
+
+    @property
+    def canonical_form(self) -> str:
+        """The avro Parsing Canonical Form of this schema, computed once.
+
+        Ref: https://avro.apache.org/docs/current/spec.html#Parsing+Canonical+Form+for+Schemas
+        """
+        try:
+            return self.__dict__["_canonical_form"]
+        except KeyError:
+            form = dumps(self._canonical(dict(), ""))
+            self.__dict__["_canonical_form"] = form
+            return form
+
+    @property
+    def fingerprint(self) -> int:
+        """The CRC-64-AVRO fingerprint of this schema's canonical form, computed once."""
+        try:
+            return self.__dict__["_fingerprint"]
+        except KeyError:
+            fp = self.__dict__["_fingerprint"] = fingerprint(
+                self.canonical_form.encode()
+            )
+            return fp
+
+    @property
+    def structural_fingerprint(self) -> int:
+        """A fingerprint of the whole schema, computed once.
+
+        Unlike the canonical form, this covers docs, defaults, aliases and
+        the like, so schemas share it just when they are equal.
+        """
+        try:
+            return self.__dict__["_structural_fingerprint"]
+        except KeyError:
+            # Defaults can be any python value, which json can't always dump.
+            form = dumps(self.to_avro(), sort_keys=True, default=repr)
+            fp = self.__dict__["_structural_fingerprint"] = fingerprint(form.encode())
+            return fp
+
 
 @dataclass
 class LogicalType(Schema):
@@ -83,14 +164,24 @@ class LogicalType(Schema):
     schema: Schema
     logical_type: str
 
-    def _to_avro(self, visited: VisitedT) -> AvroSchemaT:
-        schema = self.schema._to_avro(visited)
+    def _to_avro(self, visited: VisitedT, *, depth: int = 0) -> AvroSchemaT:
+        if depth > MAX_DEPTH:
+            return fresh_stack(self._to_avro, visited)
+        schema = self.schema._to_avro(visited, depth=depth + 1)
         if isinstance(schema, str):
             # Primitives return bare strings, so turn those into a dict
             schema = dict(type=schema)
         schema["logicalType"] = self.logical_type
         return schema
 
+    def _canonical(
+        self, names: NamesT, namespace: str, *, depth: int = 0
+    ) -> AvroSchemaT:
+        # Logical types aren't part of the canonical form.
+        if depth > MAX_DEPTH:
+            return fresh_stack(self._canonical, names, namespace)
+        return self.schema._canonical(names, namespace, depth=depth + 1)
+
 
 @dataclass
 class DecimalLogicalType(LogicalType):
@@ -99,8 +190,8 @@ class DecimalLogicalType(LogicalType):
     precision: int
     scale: Optional[int] = None
 
-    def _to_avro(self, visited: VisitedT) -> AvroSchemaT:
-        schema = super()._to_avro(visited)
+    def _to_avro(self, visited: VisitedT, *, depth: int = 0) -> AvroSchemaT:
+        schema = super()._to_avro(visited, depth=depth)
         schema["precision"] = self.precision
         if self.scale is not None:
             schema["scale"] = self.scale
@@ -116,7 +207,12 @@ class Primitive(Schema):
         type
     ]  # Optional allows None, which is "weird" in python typing
 
-    def _to_avro(self, visited: VisitedT) -> AvroSchemaT:
+    def _to_avro(self, visited: VisitedT, *, depth: int = 0) -> AvroSchemaT:
+        return self.name
+
+    def _canonical(
+        self, names: NamesT, namespace: str, *, depth: int = 0
+    ) -> AvroSchemaT:
         return self.name
 
 
@@ -140,16 +236,31 @@ class NamedSchema(Schema):
     namespace: Optional[str] = ""
     aliases: Iterable[str] = field(default_factory=list)
 
-    python_type: Optional[type] = field(default=None, compare=False)
+    # The python type given for the schema, if any, see resolve_python_type.
+    python_type: Optional[type] = field(default=None, repr=False, compare=False)
+
+    def resolve_python_type(self) -> Optional[type]:
+        """The python type of the schema, computed once.
 
-    def __post_init__(self) -> None:
+        That is python_type if given, or else the class named like the schema,
+        if any. Importing is slow, and usually fails for schemas from
+        elsewhere, so is only tried when first needed."""
+        if self.python_type is not None:
+            return self.python_type
         try:
-            self.python_type = self._import_class(self.name)
+            return self.__dict__["_resolved_python_type"]
+        except KeyError:
+            python_type = self.__dict__["_resolved_python_type"] = self._find_class()
+            return python_type
+
+    def _find_class(self) -> Optional[type]:
+        try:
+            return self._import_class(self.name)
         except ImportError:
-            pass
+            return None
 
     def _to_avro(
-        self, visited: VisitedT, *fields: str, **extras: AvroSchemaT
+        self, visited: VisitedT, *fields: str, depth: int = 0, **extras: AvroSchemaT
     ) -> AvroSchemaT:
         if self.name in visited:
             return self.name
@@ -159,6 +270,21 @@ class NamedSchema(Schema):
                 **extras, **self._add_fields("name", "namespace", "aliases", *fields)
             )
 
+    def full_name(self, namespace: str = "") -> str:
+        """The name, qualified by its own namespace or else the enclosing one."""
+        if "." in self.name:
+            return self.name
+        namespace = self.namespace or namespace
+        return f"{namespace}.{self.name}" if namespace else self.name
+
+    def _canonical(
+        self, names: NamesT, namespace: str, *, depth: int = 0, **extras: AvroSchemaT
+    ) -> AvroSchemaT:
+        if id(self) in names:
+            return names[id(self)]
+        name = names[id(self)] = self.full_name(namespace)
+        return dict(name=name, **extras)
+
 
 class Ordering(Enum):
     """How a field within a record impacts sorting multiple records"""
@@ -183,16 +309,24 @@ class AvroField(Schema):
     # Must be None so we don't add this to the schema if unspecified
     order: Optional[Ordering] = None
 
-    def _to_avro(self, visited: VisitedT) -> AvroSchemaT:
+    def _to_avro(self, visited: VisitedT, *, depth: int = 0) -> AvroSchemaT:
+        # Fields are only reached through records, which check the depth.
         return self._add_fields(
             "name",
             "doc",
             "order",
             "aliases",
-            type=self.type._to_avro(visited),
+            type=self.type._to_avro(visited, depth=depth + 1),
             default=self.default,
         )
 
+    def _canonical(
+        self, names: NamesT, namespace: str, *, depth: int = 0
+    ) -> AvroSchemaT:
+        return dict(
+            name=self.name, type=self.type._canonical(names, namespace, depth=depth + 1)
+        )
+
 
 @dataclass
 class AvroRecord(NamedSchema):
@@ -204,14 +338,33 @@ class AvroRecord(NamedSchema):
     schema_id: Optional[int] = None
 
     def _to_avro(
-        self, visited: VisitedT, *fields: str, **extras: AvroSchemaT
+        self, visited: VisitedT, *fields: str, depth: int = 0, **extras: AvroSchemaT
     ) -> AvroSchemaT:
+        if depth > MAX_DEPTH:
+            return fresh_stack(self._to_avro, visited, *fields, **extras)
         # Delay trying to flatten the fields, because the super() call here
         # adds self to visited, so that when we later flatten fields, any
         # references to this record itself will come out as a named type.
         result = super()._to_avro(visited, "doc", *fields, type="record", **extras)
         if not isinstance(result, str):
-            result["fields"] = [field._to_avro(visited) for field in self.fields]
+            result["fields"] = [
+                field._to_avro(visited, depth=depth + 1) for field in self.fields
+            ]
+        return result
+
+    def _canonical(
+        self, names: NamesT, namespace: str, *, depth: int = 0, **extras: AvroSchemaT
+    ) -> AvroSchemaT:
+        if depth > MAX_DEPTH:
+            return fresh_stack(self._canonical, names, namespace, **extras)
+        result = super()._canonical(names, namespace, type="record")
+        if not isinstance(result, str):
+            # Named types defined within the record default to its namespace.
+            namespace = result["name"].rpartition(".")[0]
+            result["fields"] = [
+                field._canonical(names, namespace, depth=depth + 1)
+                for field in self.fields
+            ]
         return result
 
 
@@ -223,13 +376,15 @@ class AvroEnum(NamedSchema):
     symbols: Iterable[str] = field(default_factory=list)
     default: Optional[str] = None
 
-    def __post_init__(self) -> None:
-        super().__post_init__()
-        if self.python_type is None:
-            self.python_type = Enum(self.name, " ".join(self.symbols))
+    def _find_class(self) -> Optional[type]:
+        python_type = super()._find_class()
+        if python_type is None:
+            # An enum of the symbols, for lack of one of its own.
+            return Enum(self.name, " ".join(self.symbols))  # type: ignore
+        return python_type
 
     def _to_avro(
-        self, visited: VisitedT, *fields: str, **extras: AvroSchemaT
+        self, visited: VisitedT, *fields: str, depth: int = 0, **extras: AvroSchemaT
     ) -> AvroSchemaT:
         return super()._to_avro(
             visited,
@@ -241,6 +396,13 @@ class AvroEnum(NamedSchema):
             **extras,
         )
 
+    def _canonical(
+        self, names: NamesT, namespace: str, *, depth: int = 0, **extras: AvroSchemaT
+    ) -> AvroSchemaT:
+        return super()._canonical(
+            names, namespace, type="enum", symbols=list(self.symbols)
+        )
+
 
 @dataclass
 class AvroArray(Schema):
@@ -248,8 +410,20 @@ class AvroArray(Schema):
 
     items: Schema
 
-    def _to_avro(self, visited: VisitedT) -> AvroSchemaT:
-        return dict(type="array", items=self.items._to_avro(visited))
+    def _to_avro(self, visited: VisitedT, *, depth: int = 0) -> AvroSchemaT:
+        if depth > MAX_DEPTH:
+            return fresh_stack(self._to_avro, visited)
+        return dict(type="array", items=self.items._to_avro(visited, depth=depth + 1))
+
+    def _canonical(
+        self, names: NamesT, namespace: str, *, depth: int = 0
+    ) -> AvroSchemaT:
+        if depth > MAX_DEPTH:
+            return fresh_stack(self._canonical, names, namespace)
+        return dict(
+            type="array",
+            items=self.items._canonical(names, namespace, depth=depth + 1),
+        )
 
 
 @dataclass
@@ -258,8 +432,20 @@ class AvroMap(Schema):
 
     values: Schema
 
-    def _to_avro(self, visited: VisitedT) -> AvroSchemaT:
-        return dict(type="map", values=self.values._to_avro(visited))
+    def _to_avro(self, visited: VisitedT, *, depth: int = 0) -> AvroSchemaT:
+        if depth > MAX_DEPTH:
+            return fresh_stack(self._to_avro, visited)
+        return dict(type="map", values=self.values._to_avro(visited, depth=depth + 1))
+
+    def _canonical(
+        self, names: NamesT, namespace: str, *, depth: int = 0
+    ) -> AvroSchemaT:
+        if depth > MAX_DEPTH:
+            return fresh_stack(self._canonical, names, namespace)
+        return dict(
+            type="map",
+            values=self.values._canonical(names, namespace, depth=depth + 1),
+        )
 
 
 @dataclass
@@ -269,12 +455,17 @@ class AvroFixed(NamedSchema):
     size: int = 0
 
     def _to_avro(
-        self, visited: VisitedT, *fields: str, **extras: AvroSchemaT
+        self, visited: VisitedT, *fields: str, depth: int = 0, **extras: AvroSchemaT
     ) -> AvroSchemaT:
         return super()._to_avro(
             visited, *fields, type="fixed", size=self.size, **extras
         )
 
+    def _canonical(
+        self, names: NamesT, namespace: str, *, depth: int = 0, **extras: AvroSchemaT
+    ) -> AvroSchemaT:
+        return super()._canonical(names, namespace, type="fixed", size=self.size)
+
 
 @dataclass
 class AvroUnion(Schema):
@@ -282,8 +473,20 @@ class AvroUnion(Schema):
 
     schemas: Iterable[Schema]
 
-    def _to_avro(self, visited: VisitedT) -> AvroSchemaT:
-        return [schema._to_avro(visited) for schema in self.schemas]
+    def _to_avro(self, visited: VisitedT, *, depth: int = 0) -> AvroSchemaT:
+        if depth > MAX_DEPTH:
+            return fresh_stack(self._to_avro, visited)
+        return [schema._to_avro(visited, depth=depth + 1) for schema in self.schemas]
+
+    def _canonical(
+        self, names: NamesT, namespace: str, *, depth: int = 0
+    ) -> AvroSchemaT:
+        if depth > MAX_DEPTH:
+            return fresh_stack(self._canonical, names, namespace)
+        return [
+            schema._canonical(names, namespace, depth=depth + 1)
+            for schema in self.schemas
+        ]
 
 
 @dataclass
@@ -302,5 +505,14 @@ class AvroNested(Schema):
 
     schema: Schema
 
-    def _to_avro(self, visited: VisitedT) -> AvroSchemaT:
-        return dict(type=self.schema._to_avro(visited))
+    def _to_avro(self, visited: VisitedT, *, depth: int = 0) -> AvroSchemaT:
+        if depth > MAX_DEPTH:
+            return fresh_stack(self._to_avro, visited)
+        return dict(type=self.schema._to_avro(visited, depth=depth + 1))
+
+    def _canonical(
+        self, names: NamesT, namespace: str, *, depth: int = 0
+    ) -> AvroSchemaT:
+        if depth > MAX_DEPTH:
+            return fresh_stack(self._canonical, names, namespace)
+        return self.schema._canonical(names, namespace, depth=depth + 1)
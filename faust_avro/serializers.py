@@ -1,16 +1,34 @@
 import asyncio
-import collections.abc
+import collections
 import contextlib
-import functools
 import json
 import struct
-from io import BytesIO
-from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple, Type
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+    cast,
+)
 
-import fastavro
 import faust
-import funcy
+from faust.exceptions import KeyDecodeError, ValueDecodeError
 from faust.serializers import codecs
+from faust.serializers.schemas import (
+    DecodeFunction,
+    OnKeyDecodeErrorFun,
+    OnValueDecodeErrorFun,
+    _noop_decode_error,
+)
 from faust.types import TopicT
 from faust.types.app import AppT
 from faust.types.codecs import CodecArg
@@ -20,120 +38,408 @@ from faust.types.serializers import KT, VT
 from faust.types.tuples import Message
 
 import faust_avro.context as ctx
-from faust_avro.asyncio import run_in_thread
+from faust_avro.asyncio import (
+    SchemaException as RegistryException,
+    SchemaNotFound,
+    run_in_thread,
+)
+from faust_avro.compatibility import Compatibility, compatible
+from faust_avro.decoder import Buffer, Decoder, compile_decoder, names_match
+from faust_avro.encoder import Encoder
 from faust_avro.record import Record
+from faust_avro.registry import Registry
+from faust_avro.schema import AvroRecord, Schema as AvroSchema
+
+if TYPE_CHECKING:
+    from faust_avro.app import App
 
 SchemaID = int
 SubjectT = str
+T = TypeVar("T")
 
 
 HEADER = struct.Struct(">bI")
 MAGIC_BYTE = 0
 
-
-@functools.singledispatch
-def faust_annotate(value) -> Any:
-    # Ensure that the whole value tree structure has been pushed through
-    # to_representation() so that we aren't passing Record subclass instances
-    # to fastavro.
-    try:
-        return faust_annotate(value.to_representation())
-    except AttributeError:
-        return value
+# https://avro.apache.org/docs/current/spec.html#single_object_encoding
+SINGLE_OBJECT_HEADER = struct.Struct("<2sQ")
+SINGLE_OBJECT_MARKER = b"\xc3\x01"
 
 
-@faust_annotate.register
-def faust_annotate_dict(value: collections.abc.Mapping) -> collections.abc.Mapping:
-    return dict([(k, faust_annotate(v)) for k, v in value.items()])
+def avro_app(app: AppT) -> "App":
+    """The app, typed as the faust_avro App that avro codecs are used with."""
+    return cast("App", app)
 
 
-@faust_annotate.register(set)
-@faust_annotate.register
-def faust_annotate_list(value: list) -> list:
-    return list([faust_annotate(item) for item in value])
+class Codec(codecs.Codec):
+    """Avro encoding, with the Confluent schema registry's id header."""
 
+    header_size = HEADER.size
 
-class Codec(codecs.Codec):
-    def __init__(self, record: Type[Record], **kwargs: Any):
+    def __init__(
+        self,
+        record: Type[Record],
+        fields: Optional[Iterable[str]] = None,
+        **kwargs: Any,
+    ):
+        """Create a new Avro codec for a Record.
+
+        :param record: The Record to encode, and to decode as.
+        :param fields: Decode only these fields of the Record, as a projection
+            of it, skipping over the rest. Encoding still uses the full Record.
+        """
         super().__init__(**kwargs)
         self.record: Type[Record] = record
+        self.fields = None if fields is None else tuple(fields)
         self.name = f"{self.record.__module__}.{self.record.__name__}"
         self.schema_id: Optional[int] = None
-        self.versions: Dict[int, str] = dict()
+        self.versions: Dict[int, AvroSchema] = dict()
+        self.decoders: Dict[int, Decoder] = dict()
+        self.compiled: Dict[int, Decoder] = dict()
+        self.projection_registry = Registry()
+
+    def intermediate_schema(self, app: AppT) -> AvroRecord:
+        return self.record._avro_forms(
+            avro_app(app).avro_schema_registry.registry
+        ).schema
+
+    def reader_schema(self, app: AppT) -> AvroRecord:
+        if self.fields is None:
+            return self.intermediate_schema(app)
+        # Projections get their own registry, as they share the record's name.
+        projection = self.record.project(*self.fields)
+        return projection._avro_forms(self.projection_registry).schema
 
-    @funcy.memoize
     def dict_schema(self, app: AppT) -> Dict[str, Any]:
-        return self.record.to_avro(app.avro_schema_registry.registry)
+        return self.record._avro_forms(avro_app(app).avro_schema_registry.registry).dict
+
+    def encoder(self, app: AppT) -> Encoder:
+        return self.record._avro_forms(
+            avro_app(app).avro_schema_registry.registry
+        ).encoder
+
+    def decoder(self, app: AppT, schema_id: SchemaID) -> Decoder:
+        try:
+            return self.decoders[schema_id]
+        except KeyError:
+            reader = self.reader_schema(app)
+            writer: AvroSchema
+            if schema_id == self.schema_id:
+                writer = self.intermediate_schema(app)
+            else:
+                writer = self.versions[schema_id]
+            # Keyed by the whole writer schema, not its canonical form, which
+            # leaves out logical types and decimal precision and scale.
+            key = writer.structural_fingerprint
+            try:
+                decoder = self.compiled[key]
+            except KeyError:
+                decoder = self.compiled[key] = compile_decoder(writer, reader)
+            self.decoders[schema_id] = decoder
+            return decoder
 
-    @funcy.memoize
     def schema(self, app: AppT) -> str:
-        return json.dumps(self.dict_schema(app))
+        return self.record._avro_forms(avro_app(app).avro_schema_registry.registry).json
 
     def _dumps(self, value: V) -> bytes:
         app = ctx.app.get()
+        schema_id = self.sync_blocking(app)
+        source = self.forwardable(value)
+        if source is not None:
+            return source
+        buffer = bytearray()
+        self._encode_into(app, schema_id, value, buffer)
+        return bytes(buffer)
 
-        # TODO: get async passed down the faust call stack so that this can
-        # be an await in this loop, rather than using threading to spawn a
-        # new loop and block the main loop on it anyway.
-        if self.schema_id is None:
-            run_in_thread(self.sync(app, ctx.subject.get()))
+    def dumps_into(self, value: V, buffer: bytearray) -> int:
+        """Encode value, header and all, onto the end of buffer.
 
-        header = HEADER.pack(MAGIC_BYTE, self.schema_id)
-        payload = BytesIO()
-        schema = self.dict_schema(app)
+        Callers encoding in a loop can reuse one buffer (or a pool of them)
+        rather than allocating for every message.
 
-        fastavro.schemaless_writer(payload, schema, faust_annotate(value))
-        return header + payload.getvalue()
+        :param value: The record to encode.
+        :param buffer: The buffer to append the encoded value to.
+
+        :returns: The size of the encoded value in bytes.
+        """
+        app = ctx.app.get()
+        schema_id = self.sync_blocking(app)
+
+        start = len(buffer)
+        source = self.forwardable(value)
+        if source is not None:
+            buffer += source
+        else:
+            self._encode_into(app, schema_id, value, buffer)
+        return len(buffer) - start
+
+    def _encode_into(
+        self, app: AppT, schema_id: SchemaID, value: V, buffer: bytearray
+    ) -> None:
+        """Encode value, header and all, onto the end of buffer, once the
+        caller has found it can't be forwarded instead."""
+        buffer += self.pack_header(schema_id)
+        self.encoder(app)(value, buffer)
+
+    def dumps_many(self, values: Iterable[V]) -> List[bytes]:
+        """Encode a batch of values in one go.
+
+        The schema id, header and encoder are looked up once for the whole
+        batch and every value is encoded onto one shared buffer.
+
+        :param values: The records to encode.
+
+        :returns: The encoded payloads, in the same order as values.
+        """
+        app = ctx.app.get()
+        header = self.pack_header(self.sync_blocking(app))
+        encode = self.encoder(app)
+        buffer = bytearray()
+        ends = []
+        for value in values:
+            source = self.forwardable(value)
+            if source is not None:
+                buffer += source
+            else:
+                buffer += header
+                encode(value, buffer)
+            ends.append(len(buffer))
+
+        view = memoryview(buffer)
+        starts = [0, *ends]
+        return [bytes(view[start:end]) for start, end in zip(starts, ends)]
 
     def _loads(self, payload: bytes) -> Any:
         app = ctx.app.get()
-        header, payload = payload[:5], payload[5:]
-        magic, schema_id = HEADER.unpack(header)
+        schema_id = self.header(payload)
+        self.resolve(app, schema_id)
 
-        if magic != MAGIC_BYTE:
-            raise faust.exceptions.ValueDecodeError(f"Bad magic byte: {magic}.")
+        # Decode in place after the header, rather than copying the body out.
+        value, _ = self.decoder(app, schema_id)(memoryview(payload), self.header_size)
+        self.remember_source(value, schema_id, payload)
+        return value
 
-        # TODO: get async passed down the faust call stack so that this can
-        # be an await in this loop, rather than using threading to spawn a
-        # new loop and block the main loop on it anyway.
-        if self.schema_id is None:
-            run_in_thread(self.sync(app, ctx.subject.get()))
+    def loads_many(self, payloads: Sequence[Buffer]) -> List[Any]:
+        """Decode a batch of payloads in one go.
 
-        if schema_id != self.schema_id:
-            # TODO: get async passed down the faust call stack so that this can
-            # be an await in this loop, rather than using threading to spawn a
-            # new loop and block the main loop on it anyway.
-            if schema_id not in self.versions:
-                run_in_thread(self.schema_by_id(app, schema_id))
-
-            return fastavro.schemaless_reader(
-                BytesIO(payload),
-                self.versions[schema_id],
-                self.dict_schema(app),
-                return_record_name=True,
-            )
+        Payloads are grouped by the writer schema id in their header, so that
+        each writer schema is resolved once and each group decoded in a loop.
 
-        return fastavro.schemaless_reader(
-            BytesIO(payload), self.dict_schema(app), return_record_name=True
-        )
+        :param payloads: The encoded values, header and all.
+
+        :returns: The decoded values, in the same order as payloads, with the
+            exception raised in place of any payload which failed to decode.
+        """
+        app = ctx.app.get()
+        values: List[Any] = [None] * len(payloads)
+        groups: Dict[SchemaID, List[int]] = collections.defaultdict(list)
+        for index, payload in enumerate(payloads):
+            try:
+                groups[self.header(payload)].append(index)
+            except Exception as e:
+                values[index] = e
+
+        for schema_id, indices in groups.items():
+            try:
+                self.resolve(app, schema_id)
+                decode = self.decoder(app, schema_id)
+            except Exception as e:
+                for index in indices:
+                    values[index] = e
+                continue
+            for index in indices:
+                payload = payloads[index]
+                try:
+                    values[index], _ = decode(memoryview(payload), self.header_size)
+                except Exception as e:
+                    values[index] = e
+                else:
+                    self.remember_source(values[index], schema_id, payload)
+        return values
+
+    def forwardable(self, value: V) -> Optional[bytes]:
+        """The payload value was decoded from, if it can be sent on untouched.
+
+        That is, if value is unchanged since and was written with the very
+        schema this codec encodes with.
+        """
+        if isinstance(value, Record):
+            source = value._avro_source()
+            if source is not None and source.schema_id == self.schema_id:
+                return source.payload
+        return None
+
+    @staticmethod
+    def remember_source(value: Any, schema_id: SchemaID, payload: Buffer) -> None:
+        # Only immutable payloads can safely be forwarded later on.
+        if (
+            isinstance(value, Record)
+            and value._avro_forward
+            and isinstance(payload, bytes)
+        ):
+            value._set_avro_source(schema_id, payload)
+
+    @staticmethod
+    def pack_header(schema_id: SchemaID) -> bytes:
+        return HEADER.pack(MAGIC_BYTE, schema_id)
+
+    @staticmethod
+    def header(payload: Buffer) -> SchemaID:
+        magic, schema_id = HEADER.unpack_from(payload)
+        if magic != MAGIC_BYTE:
+            raise ValueDecodeError(f"Bad magic byte: {magic}.")
+        return schema_id
+
+    def known(self, schema_id: SchemaID) -> bool:
+        return schema_id == self.schema_id or schema_id in self.versions
+
+    async def prefetch(self, app: AppT, payload: Buffer) -> None:
+        """Fetch the writer schema of payload ahead of decoding it, if unknown."""
+        try:
+            schema_id = self.header(payload)
+        except (ValueDecodeError, struct.error):
+            return  # Left for decoding to report.
+        if not self.known(schema_id):
+            await self.schema_by_id(app, schema_id)
+
+    def resolve(self, app: AppT, schema_id: SchemaID) -> None:
+        """Make sure the writer's schema is known, blocking if need be."""
+        if not self.known(schema_id):
+            # Only reached if the schema wasn't prefetched, as Schema.compile
+            # does, eg when calling loads directly. This blocks the loop.
+            run_in_thread(self.schema_by_id(app, schema_id))
+
+    def sync_blocking(self, app: AppT) -> SchemaID:
+        if self.schema_id is None:
+            # Only reached if not synced ahead of time, as Topic.send and app
+            # startup do, eg when using send_soon. This blocks the loop.
+            run_in_thread(self.sync(app, ctx.subject.get()))
+        return cast(SchemaID, self.schema_id)
 
     async def schema_by_id(self, app: AppT, schema_id: SchemaID) -> None:
-        self.versions[schema_id] = json.loads(
-            await app.avro_schema_registry.schema_by_id(schema_id)
-        )
+        # Writer schemas get their own registry, as their named types may
+        # well differ from the same names as this app knows them.
+        schema = await avro_app(app).avro_schema_registry.schema_by_id(schema_id)
+        self.versions[schema_id] = Registry().parse(json.loads(schema))
 
     async def compatible(self, app: AppT, subject: SubjectT) -> bool:
-        ok = await app.avro_schema_registry.compatible(subject, self.schema(app))
+        ok = await avro_app(app).avro_schema_registry.compatible(
+            subject, self.schema(app)
+        )
         if not ok:
-            print(f"{self.name} is compatible with {subject}.")
+            print(f"{self.name} is not compatible with {subject}.")
         return ok
 
+    def check(
+        self,
+        app: AppT,
+        subject: SubjectT,
+        level: Compatibility = Compatibility.BACKWARD,
+    ) -> List[str]:
+        """Check compatibility locally, against every cached version of the subject.
+
+        :param subject: The subject the record's schema would be registered under.
+        :param level: The subject's compatibility level.
+
+        :returns: A description of each incompatibility, if any, including
+            that no versions of the subject are cached (see fetch_versions).
+        """
+        cached = avro_app(app).avro_schema_registry.cached_versions(subject)
+        if cached is None:
+            return [f"No versions of {subject} are cached to check against."]
+        for version in cached:
+            if version.id not in self.versions:
+                self.versions[version.id] = Registry().parse(json.loads(version.schema))
+        versions = [self.versions[version.id] for version in cached]
+        return compatible(self.intermediate_schema(app), versions, level)
+
+    async def fetch_versions(self, app: AppT, subject: SubjectT) -> None:
+        """Fetch every version of the subject from the registry, for check."""
+        await avro_app(app).avro_schema_registry.versions(subject)
+
     async def register(self, app: AppT, subject: SubjectT) -> None:
-        schema_id = await app.avro_schema_registry.register(subject, self.schema(app))
+        schema_id = await avro_app(app).avro_schema_registry.register(
+            subject, self.schema(app)
+        )
         print(f"{self.name} registered as schema id {schema_id} on {subject}")
 
     async def sync(self, app: AppT, subject: SubjectT) -> None:
-        self.schema_id = await app.avro_schema_registry.sync(subject, self.schema(app))
+        self.schema_id = await avro_app(app).avro_schema_registry.sync(
+            subject, self.schema(app)
+        )
+
+
+class SingleObjectCodec(Codec):
+    """Avro single-object encoding, without any schema registry.
+
+    Payloads are headed by the fingerprint of their writer's schema, which
+    takes the place of the schema id. Writer schemas other than the record's
+    own are looked up in the app's avro_schema_store, so all versions of the
+    record still being written need to be in there (eg, as .avsc files).
+    """
+
+    header_size = SINGLE_OBJECT_HEADER.size
+
+    @staticmethod
+    def pack_header(schema_id: SchemaID) -> bytes:
+        return SINGLE_OBJECT_HEADER.pack(SINGLE_OBJECT_MARKER, schema_id)
+
+    @staticmethod
+    def header(payload: Buffer) -> SchemaID:
+        marker, fingerprint = SINGLE_OBJECT_HEADER.unpack_from(payload)
+        if marker != SINGLE_OBJECT_MARKER:
+            raise ValueDecodeError(f"Bad single object marker: {marker!r}.")
+        return fingerprint
+
+    def sync_blocking(self, app: AppT) -> SchemaID:
+        if self.schema_id is None:
+            self.schema_id = avro_app(app).avro_schema_store.add(
+                self.intermediate_schema(app)
+            )
+        return self.schema_id
+
+    def resolve(self, app: AppT, schema_id: SchemaID) -> None:
+        if not self.known(schema_id):
+            self.version(app, schema_id)
+
+    def version(self, app: AppT, schema_id: SchemaID) -> None:
+        try:
+            self.versions[schema_id] = avro_app(app).avro_schema_store[schema_id]
+        except KeyError:
+            raise SchemaNotFound(f"No schema with fingerprint {schema_id:#018x}.")
+
+    async def schema_by_id(self, app: AppT, schema_id: SchemaID) -> None:
+        self.version(app, schema_id)
+
+    async def compatible(self, app: AppT, subject: SubjectT) -> bool:
+        return not self.check(app, subject)
+
+    def check(
+        self,
+        app: AppT,
+        subject: SubjectT,
+        level: Compatibility = Compatibility.BACKWARD,
+    ) -> List[str]:
+        schema = self.intermediate_schema(app)
+        versions = [
+            version
+            for version in avro_app(app).avro_schema_store.schemas.values()
+            if isinstance(version, AvroRecord) and names_match(version, schema)
+        ]
+        if level is not Compatibility.NONE and not level.name.endswith("TRANSITIVE"):
+            # Fingerprints don't say which version is the latest, so check them all.
+            level = Compatibility[f"{level.name}_TRANSITIVE"]
+        return compatible(schema, versions, level)
+
+    async def fetch_versions(self, app: AppT, subject: SubjectT) -> None:
+        # The versions are all in the app's avro_schema_store already.
+        pass
+
+    async def register(self, app: AppT, subject: SubjectT) -> None:
+        self.sync_blocking(app)
+
+    async def sync(self, app: AppT, subject: SubjectT) -> None:
+        self.sync_blocking(app)
 
 
 class Schema(faust.Schema):
@@ -148,10 +454,8 @@ class Schema(faust.Schema):
         value_serializer: CodecArg = None,
         allow_empty: bool = None,
     ) -> None:
-        if key_type is not None and issubclass(key_type, Record):
-            key_serializer = Codec(key_type)
-        if value_type is not None and issubclass(value_type, Record):
-            value_serializer = Codec(value_type)
+        key_serializer = self._codec(key_type, key_serializer, "key_serializer")
+        value_serializer = self._codec(value_type, value_serializer, "value_serializer")
         super().update(
             key_type=key_type,
             value_type=value_type,
@@ -160,21 +464,92 @@ class Schema(faust.Schema):
             allow_empty=allow_empty,
         )
 
-    def _spray(self, app: AppT, topic: TopicT, method) -> Iterator[Awaitable[Any]]:
+    def _codec(self, typ: ModelArg, serializer: CodecArg, attr: str) -> CodecArg:
+        if typ is None or not issubclass(typ, Record):
+            return serializer
+        # An explicit Codec (eg, a projection) is kept, including across the
+        # later updates faust makes with just the types.
+        for codec in (serializer, getattr(self, attr, None)):
+            if isinstance(codec, Codec) and codec.record is typ:
+                return codec
+        return Codec(typ)
+
+    def _spray(self, app: AppT, topic: TopicT, method: Callable[..., T]) -> Iterator[T]:
         for topic_name in topic.topics:
-            if self.key_serializer is not None:
+            if isinstance(self.key_serializer, Codec):
                 yield method(self.key_serializer, app, f"{topic_name}-key")
-            if self.value_serializer is not None:
+            if isinstance(self.value_serializer, Codec):
                 yield method(self.value_serializer, app, f"{topic_name}-value")
 
     async def compatible(self, app: AppT, topic: TopicT) -> List[bool]:
-        return await asyncio.gather(*list(self._spray(app, topic, Codec.compatible)))
+        return await asyncio.gather(
+            *list(self._spray(app, topic, lambda codec, *args: codec.compatible(*args)))
+        )
 
     async def register(self, app: AppT, topic: TopicT) -> None:
-        return await asyncio.gather(*list(self._spray(app, topic, Codec.register)))
+        return await asyncio.gather(
+            *list(self._spray(app, topic, lambda codec, *args: codec.register(*args)))
+        )
 
     async def sync(self, app: AppT, topic: TopicT) -> None:
-        return await asyncio.gather(*list(self._spray(app, topic, Codec.sync)))
+        return await asyncio.gather(
+            *list(self._spray(app, topic, lambda codec, *args: codec.sync(*args)))
+        )
+
+    async def ready(self, app: AppT, topic: TopicT) -> None:
+        """Sync any codecs not yet synced, so that encoding never blocks."""
+        for codec in (self.key_serializer, self.value_serializer):
+            if isinstance(codec, Codec) and codec.schema_id is None:
+                await self.sync(app, topic)
+                return
+
+    async def prefetch(self, app: AppT, message: Message) -> None:
+        """Fetch any writer schemas needed to decode message, so that decoding never blocks."""
+        await self.prefetch_key(app, message)
+        await self.prefetch_value(app, message)
+
+    async def prefetch_key(self, app: AppT, message: Message) -> None:
+        if isinstance(self.key_serializer, Codec) and message.key is not None:
+            await self.key_serializer.prefetch(app, message.key)
+
+    async def prefetch_value(self, app: AppT, message: Message) -> None:
+        if isinstance(self.value_serializer, Codec) and message.value is not None:
+            await self.value_serializer.prefetch(app, message.value)
+
+    def compile(
+        self,
+        app: AppT,
+        *,
+        on_key_decode_error: OnKeyDecodeErrorFun = _noop_decode_error,
+        on_value_decode_error: OnValueDecodeErrorFun = _noop_decode_error,
+        default_propagate: bool = False,
+    ) -> DecodeFunction:
+        """Compile function used to decode event, fetching writer schemas first."""
+        decode = super().compile(
+            app,
+            on_key_decode_error=on_key_decode_error,
+            on_value_decode_error=on_value_decode_error,
+            default_propagate=default_propagate,
+        )
+
+        async def prefetch_and_decode(
+            message: Message, *, propagate: bool = default_propagate
+        ) -> Any:
+            try:
+                await self.prefetch_key(app, message)
+            except RegistryException as exc:
+                if propagate:
+                    raise KeyDecodeError(str(exc)) from exc
+                return await on_key_decode_error(KeyDecodeError(str(exc)), message)
+            try:
+                await self.prefetch_value(app, message)
+            except RegistryException as exc:
+                if propagate:
+                    raise ValueDecodeError(str(exc)) from exc
+                return await on_value_decode_error(ValueDecodeError(str(exc)), message)
+            return await decode(message, propagate=propagate)
+
+        return prefetch_and_decode
 
     @contextlib.contextmanager
     def context(self, app: AppT, subject: SubjectT):
@@ -203,6 +578,54 @@ class Schema(faust.Schema):
         with self.context(app, f"{message.topic}-value"):
             return super().loads_value(app, message, loads=loads, serializer=serializer)
 
+    def loads_keys(
+        self, app: AppT, messages: Sequence[Message]
+    ) -> List[Union[KT, KeyDecodeError]]:
+        """Deserialize the keys of a batch of messages at once.
+
+        A message whose key fails to deserialize gets the KeyDecodeError
+        loads_key would have raised, in place of its key."""
+        return self._loads_many(app, messages, "key", self.key_serializer)
+
+    def loads_values(
+        self, app: AppT, messages: Sequence[Message]
+    ) -> List[Union[VT, ValueDecodeError]]:
+        """Deserialize the values of a batch of messages at once.
+
+        A message whose value fails to deserialize gets the ValueDecodeError
+        loads_value would have raised, in place of its value."""
+        return self._loads_many(app, messages, "value", self.value_serializer)
+
+    def _loads_many(
+        self, app: AppT, messages: Sequence[Message], part: str, serializer: CodecArg
+    ) -> List[Any]:
+        loads = self.loads_key if part == "key" else self.loads_value
+        error = KeyDecodeError if part == "key" else ValueDecodeError
+        results: List[Any] = [None] * len(messages)
+        if not isinstance(serializer, Codec):
+            for index, message in enumerate(messages):
+                try:
+                    results[index] = loads(app, message)
+                except error as e:
+                    results[index] = e
+            return results
+
+        topics: Dict[str, List[int]] = collections.defaultdict(list)
+        for index, message in enumerate(messages):
+            if getattr(message, part) is not None:
+                topics[message.topic].append(index)
+
+        for topic_name, indices in topics.items():
+            payloads = [getattr(messages[index], part) for index in indices]
+            with self.context(app, f"{topic_name}-{part}"):
+                for index, value in zip(indices, serializer.loads_many(payloads)):
+                    if isinstance(value, Exception) and not isinstance(value, error):
+                        # As faust's loads_key and loads_value wrap them.
+                        cause, value = value, error(str(value))
+                        value.__cause__ = cause
+                    results[index] = value
+        return results
+
     def dumps_key(
         self,
         app: AppT,
@@ -215,6 +638,27 @@ class Schema(faust.Schema):
         with self.context(app, f"{topic_name}-key"):
             return super().dumps_key(app, key, serializer=serializer, headers=headers)
 
+    def _dumps_many(
+        self, app: AppT, subject: SubjectT, serializer: CodecArg, items: Sequence
+    ) -> Sequence:
+        if not isinstance(serializer, Codec):
+            # Left for faust to serialize one at a time as they are sent.
+            return items
+        with self.context(app, subject):
+            return serializer.dumps_many(items)
+
+    def dumps_keys(self, app: AppT, keys: Sequence[K]) -> Sequence[Any]:
+        """Serialize a batch of keys at once, where they are avro records."""
+        topic_name, *_ = ctx.topic.get().topics
+        return self._dumps_many(app, f"{topic_name}-key", self.key_serializer, keys)
+
+    def dumps_values(self, app: AppT, values: Sequence[V]) -> Sequence[Any]:
+        """Serialize a batch of values at once, where they are avro records."""
+        topic_name, *_ = ctx.topic.get().topics
+        return self._dumps_many(
+            app, f"{topic_name}-value", self.value_serializer, values
+        )
+
     def dumps_value(
         self,
         app: AppT,
@@ -0,0 +1,65 @@
+"""
+A local store of writer schemas, indexed by fingerprint.
+
+Avro single-object encoding identifies the writer's schema by the 64-bit
+fingerprint of its canonical form, rather than by a schema registry id. So
+writer schemas can be looked up locally, without a schema registry at all.
+
+Ref: https://avro.apache.org/docs/current/spec.html#single_object_encoding
+"""
+
+import json
+from pathlib import Path
+from typing import Dict, Iterator, Union
+
+from faust_avro.registry import Registry
+from faust_avro.schema import NamedSchema, Schema
+
+__all__ = ["SchemaStore"]
+
+
+class SchemaStore:
+    """Writer schemas, by fingerprint."""
+
+    def __init__(self, path: Union[str, Path, None] = None) -> None:
+        """Create a new schema store.
+
+        :param path: A directory of .avsc files (or a single one) to load.
+        """
+        self.schemas: Dict[int, Schema] = dict()
+        if path is not None:
+            self.load(path)
+
+    def __contains__(self, fingerprint: int) -> bool:
+        return fingerprint in self.schemas
+
+    def __getitem__(self, fingerprint: int) -> Schema:
+        return self.schemas[fingerprint]
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.schemas)
+
+    def __len__(self) -> int:
+        return len(self.schemas)
+
+    def add(self, schema: Schema) -> int:
+        """Add a schema to the store.
+
+        :returns: The schema's fingerprint.
+        """
+        self.schemas.setdefault(schema.fingerprint, schema)
+        return schema.fingerprint
+
+    def load(self, path: Union[str, Path]) -> None:
+        """Add the schemas in a .avsc file, or in all .avsc files in a directory."""
+        path = Path(path)
+        for avsc in sorted(path.glob("*.avsc")) if path.is_dir() else [path]:
+            # Each gets its own registry, as different versions of a schema
+            # share the same names.
+            self.add(Registry().parse(json.loads(avsc.read_text())))
+
+    def update(self, registry: Registry) -> None:
+        """Add the named schemas in a registry."""
+        for schema in registry.values():
+            if isinstance(schema, NamedSchema):
+                self.add(schema)
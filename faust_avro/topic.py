@@ -1,13 +1,21 @@
-from typing import Any, Tuple
+import asyncio
+from typing import Any, Awaitable, List, Mapping, Optional, Sequence, Tuple
 
 import faust
-from faust.types import AppT, CodecArg, SchemaT
-from faust.types.core import K, OpenHeadersArg, V
+from faust.types import AppT, CodecArg, RecordMetadata, SchemaT
+from faust.types.core import HeadersArg, K, OpenHeadersArg, V
 
 from faust_avro.context import context, topic
 from faust_avro.serializers import Schema
 
 
+def copy_headers(headers: HeadersArg) -> HeadersArg:
+    """A copy of headers, as faust adds to the headers of a message in place."""
+    if headers is None:
+        return None
+    return dict(headers) if isinstance(headers, Mapping) else list(headers)
+
+
 class Topic(faust.Topic):
     """A modified faust.Topic that injects itself into the schema.dumps call."""
 
@@ -21,6 +29,9 @@ class Topic(faust.Topic):
         headers: OpenHeadersArg = None,
     ) -> Tuple[Any, OpenHeadersArg]:
         """Serialize key to format suitable for transport."""
+        if isinstance(key, bytes):
+            # Already serialized, eg by send_many.
+            return key, headers
         with context(topic, self):
             return super().prepare_key(key, key_serializer, schema, headers)
 
@@ -32,9 +43,67 @@ class Topic(faust.Topic):
         headers: OpenHeadersArg = None,
     ) -> Tuple[Any, OpenHeadersArg]:
         """Serialize value to format suitable for transport."""
+        if isinstance(value, bytes):
+            # Already serialized, eg by send_many.
+            return value, headers
         with context(topic, self):
             return super().prepare_value(value, value_serializer, schema, headers)
 
+    async def send(self, **kwargs: Any) -> Awaitable[RecordMetadata]:
+        """Send a message, syncing avro schemas first so encoding never blocks."""
+        schema = kwargs.get("schema") or self.schema
+        if isinstance(schema, Schema):
+            await schema.ready(self.app, self)
+        return await super().send(**kwargs)
+
+    async def send_many(
+        self,
+        values: Sequence[V],
+        *,
+        keys: Optional[Sequence[K]] = None,
+        partition: Optional[int] = None,
+        timestamp: Optional[float] = None,
+        headers: HeadersArg = None,
+        force: bool = False,
+    ) -> List[Awaitable[RecordMetadata]]:
+        """Send a batch of values, serializing them all up front in one go.
+
+        The values are sent concurrently, each with its own copy of headers.
+        Sends are started in order, so reach the producer in order.
+
+        :param values: The values to send.
+        :param keys: The keys to send the values with, if any, one per value.
+
+        :returns: The send results, in the same order as values.
+        """
+        values = list(values)
+        if keys is None:
+            keys = [None] * len(values)
+        elif len(keys) != len(values):
+            raise ValueError(f"Got {len(keys)} keys for {len(values)} values.")
+
+        await self.schema.ready(self.app, self)
+        with context(topic, self):
+            if all(key is not None for key in keys):
+                keys = self.schema.dumps_keys(self.app, keys)
+            values = self.schema.dumps_values(self.app, values)
+
+        return list(
+            await asyncio.gather(
+                *[
+                    self.send(
+                        key=key,
+                        value=value,
+                        partition=partition,
+                        timestamp=timestamp,
+                        headers=copy_headers(headers),
+                        force=force,
+                    )
+                    for key, value in zip(keys, values)
+                ]
+            )
+        )
+
     async def compatible(self, app: AppT) -> bool:
         return all(await self.schema.compatible(app, self))
 
@@ -0,0 +1,123 @@
+"""
+Recursive schema walks, within python's recursion limit.
+
+Schemas nest arbitrarily deep, so walking them with plain recursion could hit
+python's recursion limit. Walks recurse as usual, but pass their depth down,
+and once past MAX_DEPTH carry on from a fresh stack:
+
+    def depth(schema, level=0):
+        if level > MAX_DEPTH:
+            return fresh_stack(depth, schema)
+        if isinstance(schema, AvroArray):
+            return 1 + depth(schema.items, level + 1)
+        return 0
+
+Ordinary schemas never get that deep, so cost no more than the recursion.
+
+Walks used to be generators driven from an explicit stack, which never
+recursed at all, but resuming a generator costs several times a plain call,
+and that made parsing and to_avro about twice as slow for every schema.
+Here only schemas deeper than MAX_DEPTH pay, a thread per MAX_DEPTH levels.
+Parsing, to_avro, canonical forms, fingerprints, compatibility checks and
+the compiled encoders and decoders all walk this way.
+"""
+
+import contextvars
+import json
+import threading
+from typing import Any, Callable, List, Optional, Tuple, TypeVar
+
+__all__ = ["MAX_DEPTH", "dumps", "fresh_stack"]
+
+T = TypeVar("T")
+
+# How deep a walk recurses before carrying on from a fresh stack. Well within
+# the default recursion limit, even at a few frames per level.
+MAX_DEPTH = 100
+
+# The stack size of the threads walks carry on in, as some platforms default
+# to too small a one for MAX_DEPTH levels.
+STACK_SIZE = 16 * 1024 * 1024
+
+# threading.stack_size applies to all threads started, so is set just around
+# starting each of ours. A thread started elsewhere at that moment may get
+# the larger stack too, which only reserves more address space for it.
+_stack_size_lock = threading.Lock()
+
+
+def fresh_stack(function: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Call a function from a fresh stack, and wait for its result.
+
+    python limits the recursion of each thread separately, so the function
+    runs on a new thread, in a copy of the current context.
+
+    :param function: The function to call.
+    :param args: The arguments to call it with.
+    :param kwargs: The keyword arguments to call it with.
+
+    :returns: Whatever the function returns, or raises whatever it raises.
+    """
+    context = contextvars.copy_context()
+    outcome: List[Tuple[bool, Any]] = []
+
+    def call() -> None:
+        try:
+            outcome.append((True, context.run(function, *args, **kwargs)))
+        except BaseException as e:
+            outcome.append((False, e))
+
+    with _stack_size_lock:
+        previous = threading.stack_size(STACK_SIZE)
+        try:
+            thread = threading.Thread(target=call, name="faust-avro-walk")
+            thread.start()
+        finally:
+            threading.stack_size(previous)
+    thread.join()
+
+    returned, value = outcome[0]
+    if returned:
+        return value
+    raise value
+
+
+def dumps(
+    data: Any, sort_keys: bool = False, default: Optional[Callable[[Any], Any]] = None
+) -> str:
+    """Serialize json data compactly, like json.dumps with no whitespace.
+
+    :param data: The json data, with dicts and lists nested to any depth.
+    :param sort_keys: Whether to output dicts sorted by key.
+    :param default: Called for any value json can't otherwise serialize.
+
+    :returns: The json string.
+    """
+    try:
+        return json.dumps(
+            data, sort_keys=sort_keys, default=default, separators=(",", ":")
+        )
+    except RecursionError:
+        # The json module recurses in C, so can't carry on from a fresh stack.
+        return _dump(data, sort_keys, default)
+
+
+def _dump(data: Any, sort_keys: bool, default: Any, depth: int = 0) -> str:
+    if depth > MAX_DEPTH:
+        return fresh_stack(_dump, data, sort_keys, default)
+    elif isinstance(data, dict):
+        items = sorted(data.items()) if sort_keys else data.items()
+        return (
+            "{"
+            + ",".join(
+                f"{json.dumps(key)}:{_dump(value, sort_keys, default, depth + 1)}"
+                for key, value in items
+            )
+            + "}"
+        )
+    elif isinstance(data, (list, tuple)):
+        return (
+            "["
+            + ",".join(_dump(value, sort_keys, default, depth + 1) for value in data)
+            + "]"
+        )
+    return json.dumps(data, default=default)
@@ -1,6 +1,9 @@
+from unittest.mock import patch
+
 import pytest
 from assertpy import assert_that
-from faust_avro import SchemaAlreadyDefinedError, UnknownTypeError
+from faust_avro import InvalidNameError, SchemaAlreadyDefinedError, UnknownTypeError
+from faust_avro.registry import Registry
 
 
 def avsc(type="null", **kwargs):
@@ -87,8 +90,45 @@ def test_avro(registry, avro):
         ),
         (UnknownTypeError, b"str"),  # bytearray, rather than string fails
         (UnknownTypeError, dict(type="rabbit_of_caerbannog")),
+        (InvalidNameError, record("X\n    print('INJECTED') #")),
+        (InvalidNameError, enum("it's", "a")),
+        (InvalidNameError, fixed("F", namespace="1st")),
+        (InvalidNameError, record("R", aliases=["a-b"])),
+        (InvalidNameError, record("R", fields=[field("x.y")])),
     ],
 )
 def test_avro_garbage(registry, exception, avro):
     with pytest.raises(exception):
         registry.parse(avro)
+
+
+def test_avro_rollback(registry):
+    kept = registry.parse(dict(type="enum", name="Kept", symbols=["A"]))
+    before = dict(registry)
+    bad = dict(
+        type="record",
+        name="Bad",
+        fields=[
+            field("kept", "Kept"),
+            field("new", dict(type="enum", name="New", symbols=["B"])),
+            field("oops", "rabbit_of_caerbannog"),
+        ],
+    )
+    with patch.object(Registry, "copy") as copy, pytest.raises(UnknownTypeError):
+        registry.parse(bad)
+    assert_that(copy.called).is_false()
+    assert_that(dict(registry)).is_equal_to(before)
+    assert_that(registry["Kept"]).is_same_as(kept)
+    assert_that(registry).does_not_contain("Bad", "New")
+
+
+def test_avro_rewrite(registry):
+    suit = dict(type="enum", name="Suit", symbols=["A"])
+    registry.parse(suit)
+    again = Registry().parse(suit)
+    with patch.object(type(again), "__eq__") as eq:
+        registry.add(again)
+    assert_that(eq.called).is_false()
+
+    with pytest.raises(SchemaAlreadyDefinedError):
+        registry.add(Registry().parse(dict(suit, doc="Now documented.")))
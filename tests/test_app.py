@@ -1,10 +1,16 @@
+import asyncio
+import gc
 import subprocess
 import tempfile
+from types import SimpleNamespace
+from unittest.mock import patch
 
 import pytest
 from assertpy import assert_that
 from faust_avro import App, Record
+from faust_avro.asyncio import SubjectNotFound
 from faust_avro.serializers import Schema
+from faust_avro.topic import Topic
 
 
 @pytest.mark.vcr()
@@ -43,3 +49,95 @@ def test_schema():
     assert_that(result.stdout).is_equal_to(
         b"{'type': 'record', 'name': 'examples.log_message.LogMessage', 'aliases': ['LogMessage'], 'fields': [{'type': 'string', 'name': 'fmt'}, {'type': {'type': 'map', 'values': 'string'}, 'name': 'data'}]}\n"
     )
+
+
+def test_schema_cache_dir(app):
+    cache_dir = app.avro_schema_registry.cache_dir
+    assert_that(str(cache_dir)).starts_with(str(app.conf.datadir))
+
+
+def test_schema_cache_dir_configured(tmp_path):
+    app = App("unittest")
+    app.config_from_object(dict(datadir=str(tmp_path)))
+    cache_dir = app.avro_schema_registry.cache_dir
+    assert_that(str(cache_dir)).starts_with(str(tmp_path))
+
+
+def test_avro_topics_weak(app):
+    class Person(Record):
+        name: str
+
+    kept = app.topic("kept", value_type=Person)
+    app.topic("passing", value_type=Person)
+    gc.collect()
+    with patch.object(App, "tables", {}):
+        assert_that(app.avro_topics()).is_equal_to([kept])
+
+
+@pytest.mark.asyncio
+async def test_warm_up(app, asr_sync):
+    class Person(Record):
+        name: str
+
+    running, most = 0, 0
+
+    async def sync(subject, schema):
+        nonlocal running, most
+        running += 1
+        most = max(most, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return len(subject)
+
+    asr_sync.side_effect = sync
+    app.registry_concurrency = 2
+    topics = [
+        app.topic(f"topic-{i}", key_type=Person, value_type=Person) for i in range(3)
+    ]
+    changelog = Topic(app, topics=["changelog"], key_type=Person, value_type=Person)
+    tables = dict(table=SimpleNamespace(changelog_topic=changelog))
+
+    with patch.object(App, "tables", tables):
+        await app.warm_up()
+        assert_that(app.avro_topics()).contains(changelog, *topics)
+
+    assert_that(asr_sync.await_count).is_equal_to(8)
+    assert_that(most).is_equal_to(2)
+    for topic in topics:
+        assert_that(topic.schema.value_serializer.schema_id).is_equal_to(13)
+
+    with patch.object(App, "tables", tables):
+        await app.warm_up()
+    assert_that(asr_sync.await_count).is_equal_to(8)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("compatible,registered", [(True, 3), (False, 0)])
+async def test_register_schemas(app, asr_sync, compatible, registered):
+    class Person(Record):
+        name: str
+
+    # Held onto, as apps only hold their topics weakly.
+    topics = [
+        app.topic(f"topic-{i}", key_type=Person, value_type=Person) for i in range(3)
+    ]
+
+    async def sync(subject, schema):
+        if subject.endswith("-value"):
+            raise SubjectNotFound(subject)
+        return 1
+
+    asr_sync.side_effect = sync
+    client = app.avro_schema_registry
+    with patch.object(client, "compatible", spec=True) as asr_compatible, patch.object(
+        client, "register", spec=True
+    ) as asr_register, patch.object(App, "tables", {}):
+        asr_compatible.return_value = compatible
+        assert_that(app.avro_topics()).contains(*topics)
+        outcomes = await app.register_schemas()
+
+    assert_that(outcomes).contains_entry(dict(existing=3))
+    assert_that(asr_compatible.await_count).is_equal_to(3)
+    assert_that(asr_register.await_count).is_equal_to(registered)
+    assert_that(outcomes["registered"]).is_equal_to(registered)
+    assert_that(outcomes["incompatible"]).is_equal_to(3 - registered)
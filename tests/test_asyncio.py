@@ -1,12 +1,19 @@
+import asyncio
+import contextlib
 import json
 import threading
 
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
 import pytest
 from assertpy import add_extension, assert_that
 from faust_avro.asyncio import (
     ConfluentSchemaRegistryClient,
+    RegistryUnavailable,
     SchemaNotFound,
     SubjectNotFound,
+    Version,
     run_in_thread,
 )
 
@@ -132,3 +139,211 @@ async def test_incompatible(
 ):
     await client.register(subject, avro_schema)
     assert_that(await client.compatible(subject, avro_schema_incompatible)).is_false()
+
+
+@pytest.mark.asyncio
+async def test_pooled_session(client):
+    async with client.session() as one_shot:
+        assert_that(client._session).is_none()
+    assert_that(one_shot.closed).is_true()
+
+    await client.start()
+    async with client.session() as first, client.session() as second:
+        assert_that(first).is_same_as(second).is_same_as(client._session)
+
+    sessions = []
+
+    async def other_loop():
+        async with client.session() as session:
+            sessions.append(session)
+
+    run_in_thread(other_loop())
+    assert_that(sessions[0]).is_not_same_as(first)
+    assert_that(sessions[0].closed).is_true()
+
+    await client.close()
+    assert_that(first.closed).is_true()
+    assert_that(client._session).is_none()
+
+
+def fake_response(client, method, *responses):
+    calls = []
+
+    @contextlib.asynccontextmanager
+    async def request(path, **json):
+        calls.append(path)
+        await asyncio.sleep(0)
+        yield responses[min(len(calls), len(responses)) - 1]
+
+    setattr(client, method, request)
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_schema_by_id_cached(client, avro_schema):
+    calls = fake_response(client, "get", dict(schema=avro_schema))
+    schemas = await asyncio.gather(*[client.schema_by_id(1) for _ in range(5)])
+    assert_that(schemas).is_equal_to([avro_schema] * 5)
+    assert_that(await client.schema_by_id(1)).is_equal_to(avro_schema)
+    assert_that(calls).is_length(1)
+
+
+@pytest.mark.asyncio
+async def test_sync_not_found_cached(client, avro_schema):
+    calls = fake_response(client, "post", dict(error_code=40401), dict(id=3))
+    for _ in range(2):
+        with pytest.raises(SubjectNotFound):
+            await client.sync("subject", avro_schema)
+    assert_that(calls).is_length(1)
+
+    assert_that(await client.register("subject", avro_schema)).is_equal_to(3)
+    assert_that(await client.sync("subject", avro_schema)).is_equal_to(3)
+    assert_that(await client.schema_by_id(3)).is_equal_to(avro_schema)
+    assert_that(calls).is_length(2)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("ttl,requests", [(60, 1), (0, 2)])
+async def test_latest_ttl(avro_schema, ttl, requests):
+    client = ConfluentSchemaRegistryClient(latest_ttl=ttl)
+    calls = fake_response(client, "get", dict(schema=avro_schema))
+    for _ in range(2):
+        assert_that(await client.schema_by_topic("subject")).is_equal_to(avro_schema)
+    assert_that(calls).is_length(requests)
+
+
+@pytest.mark.asyncio
+async def test_cache_dir(tmp_path, avro_schema):
+    client = ConfluentSchemaRegistryClient(cache_dir=tmp_path)
+    fake_response(client, "post", dict(id=4, version=2))
+    fake_response(client, "get", dict(schema=avro_schema))
+    assert_that(await client.sync("sub/ject", avro_schema)).is_equal_to(4)
+    assert_that(await client.schema_by_id(5)).is_equal_to(avro_schema)
+
+    restarted = ConfluentSchemaRegistryClient(cache_dir=tmp_path)
+    posts = fake_response(restarted, "post", dict(error_code=500))
+    gets = fake_response(restarted, "get", dict(error_code=500))
+    assert_that(await restarted.sync("sub/ject", avro_schema)).is_equal_to(4)
+    assert_that(await restarted.schema_by_id(4)).is_equal_to(avro_schema)
+    assert_that(await restarted.schema_by_id(5)).is_equal_to(avro_schema)
+    assert_that(posts + gets).is_empty()
+    assert_that(restarted.cached_versions("sub/ject")).is_equal_to(
+        [Version(2, 4, avro_schema)]
+    )
+    assert_that([p.name for p in tmp_path.glob("*/.*")]).is_empty()
+
+
+def test_cache_dir_damaged(tmp_path, avro_schema, caplog):
+    (tmp_path / "ids").mkdir()
+    (tmp_path / "ids" / "4.avsc").write_text(avro_schema)
+    (tmp_path / "ids" / "stray.avsc").write_text(avro_schema)
+    (tmp_path / "subjects").mkdir()
+    ids = {avro_schema: dict(id=4, version=1)}
+    (tmp_path / "subjects" / "subject.json").write_text(json.dumps(ids))
+    (tmp_path / "subjects" / "corrupt.json").write_text("{")
+    client = ConfluentSchemaRegistryClient(cache_dir=tmp_path)
+    assert_that(client._schemas).is_equal_to({4: avro_schema})
+    assert_that(client._ids).is_equal_to({("subject", avro_schema): 4})
+    assert_that(client._numbers).is_equal_to({("subject", avro_schema): 1})
+    assert_that(caplog.text).contains("stray.avsc", "corrupt.json")
+
+
+@pytest.mark.asyncio
+async def test_versions(client, avro_schema, avro_schema_compatible):
+    assert_that(client.cached_versions("subject")).is_none()
+    # Subjects share ids, so a later version can have a lower id.
+    calls = fake_response(
+        client,
+        "get",
+        [1, 2],
+        dict(id=5, version=1, schema=avro_schema),
+        dict(id=3, version=2, schema=avro_schema_compatible),
+    )
+    expected = [Version(1, 5, avro_schema), Version(2, 3, avro_schema_compatible)]
+    assert_that(await client.versions("subject")).is_equal_to(expected)
+    assert_that(client.cached_versions("subject")).is_equal_to(expected)
+    assert_that(calls).is_equal_to(
+        [
+            "/subjects/subject/versions",
+            *[f"/subjects/subject/versions/{v}" for v in (1, 2)],
+        ]
+    )
+
+
+@pytest.mark.asyncio
+async def test_versions_new_subject(client):
+    fake_response(client, "get", dict(error_code=40401))
+    assert_that(await client.versions("subject")).is_empty()
+    assert_that(client.cached_versions("subject")).is_empty()
+
+
+@pytest.mark.asyncio
+async def test_cache_dir_unwritable(tmp_path, avro_schema, caplog):
+    # A file where the cache's directories would go.
+    (tmp_path / "ids").write_text("")
+    client = ConfluentSchemaRegistryClient(cache_dir=tmp_path)
+    fake_response(client, "get", dict(schema=avro_schema))
+    assert_that(await client.schema_by_id(5)).is_equal_to(avro_schema)
+    assert_that(caplog.text).contains("Could not cache")
+    await client.close()
+
+
+@contextlib.asynccontextmanager
+async def registry_server(*statuses, delay=0):
+    """A local registry which answers with each status in turn, then 200s."""
+    requests = []
+
+    async def handler(request):
+        requests.append(request.path)
+        await asyncio.sleep(delay)
+        status = statuses[len(requests) - 1] if len(requests) <= len(statuses) else 200
+        return web.json_response(dict(schema="{}", error_code=status), status=status)
+
+    app = web.Application()
+    app.router.add_route("*", "/{tail:.*}", handler)
+    async with TestServer(app) as server:
+        server.requests = requests
+        yield server
+
+
+def resilient(*urls, **kwargs):
+    kwargs = dict(dict(backoff=0, failure_threshold=1), **kwargs)
+    return ConfluentSchemaRegistryClient([str(url) for url in urls], **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_retry():
+    async with registry_server(500, 503) as server:
+        client = resilient(server.make_url(""), failure_threshold=5)
+        assert_that(await client.schema_by_id(1)).is_equal_to("{}")
+        assert_that(server.requests).is_length(3)
+
+
+@pytest.mark.asyncio
+async def test_failover():
+    async with registry_server(503) as bad, registry_server() as good:
+        client = resilient(bad.make_url(""), good.make_url(""))
+        assert_that(await client.schema_by_id(1)).is_equal_to("{}")
+        assert_that(client.url).is_equal_to(str(good.make_url("")))
+        assert_that(await client.schema_by_id(2)).is_equal_to("{}")
+        assert_that(bad.requests).is_length(1)
+        assert_that(good.requests).is_length(2)
+
+
+@pytest.mark.asyncio
+async def test_circuit_open(avro_schema):
+    async with registry_server(*[500] * 10) as server:
+        client = resilient(server.make_url(""), retries=5, latest_ttl=0)
+        client._latest["subject"] = (0, avro_schema)
+        assert_that(await client.schema_by_topic("subject")).is_equal_to(avro_schema)
+        with pytest.raises(RegistryUnavailable):
+            await client.schema_by_id(1)
+        assert_that(server.requests).is_length(1)
+
+
+@pytest.mark.asyncio
+async def test_deadline():
+    async with registry_server(delay=1) as server:
+        client = resilient(server.make_url(""), deadline=0.1)
+        with pytest.raises(RegistryUnavailable):
+            await client.schema_by_id(1)
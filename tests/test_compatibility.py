@@ -0,0 +1,145 @@
+import json
+from typing import Optional
+from unittest.mock import patch
+
+import pytest
+from assertpy import assert_that
+from faust_avro import App, Record
+from faust_avro.compatibility import Compatibility, can_read, compatible
+from faust_avro.registry import Registry
+
+
+def record(*fields, name="Person"):
+    return Registry().parse(dict(type="record", name=name, fields=list(fields)))
+
+
+NAME = dict(name="name", type="string")
+AGE = dict(name="age", type="int")
+AGE_DEFAULT = dict(name="age", type="int", default=0)
+
+
+def test_same():
+    assert_that(can_read(record(NAME), record(NAME))).is_empty()
+
+
+def test_added_field():
+    assert_that(can_read(record(NAME), record(NAME, AGE_DEFAULT))).is_empty()
+    assert_that(can_read(record(NAME), record(NAME, AGE))).is_length(1)
+    assert_that(can_read(record(NAME, AGE), record(NAME))).is_empty()
+
+
+def test_alias():
+    renamed = dict(name="years", type="long", aliases=["age"])
+    assert_that(can_read(record(AGE), record(renamed))).is_empty()
+
+
+@pytest.mark.parametrize(
+    "writer,reader,ok",
+    [
+        ("int", "long", True),
+        ("long", "int", False),
+        ("string", "bytes", True),
+        (["null", "int"], ["null", "long"], True),
+        (["null", "string"], "string", False),
+        ("string", ["null", "string"], True),
+        (dict(type="array", items="int"), dict(type="array", items="double"), True),
+        (dict(type="map", values="string"), dict(type="map", values="int"), False),
+    ],
+)
+def test_types(writer, reader, ok):
+    problems = can_read(
+        record(dict(name="f", type=writer)), record(dict(name="f", type=reader))
+    )
+    assert_that(not problems).is_equal_to(ok)
+
+
+def test_enum():
+    def suit(*symbols, **kwargs):
+        return dict(
+            name="s", type=dict(type="enum", name="S", symbols=symbols, **kwargs)
+        )
+
+    assert_that(can_read(record(suit("a")), record(suit("a", "b")))).is_empty()
+    assert_that(can_read(record(suit("a", "b")), record(suit("a")))).is_length(1)
+    assert_that(
+        can_read(record(suit("a", "b")), record(suit("a", default="a")))
+    ).is_empty()
+
+
+class Node(Record, avro_name="Node"):
+    value: str
+    next: Optional["Node"] = None
+
+
+def test_recursive():
+    writer = Registry().parse(Node.to_avro(Registry()))
+    reader = Registry().parse(Node.to_avro(Registry()))
+    assert_that(can_read(writer, reader)).is_empty()
+
+
+@pytest.mark.parametrize(
+    "level,ok",
+    [
+        (Compatibility.NONE, True),
+        (Compatibility.BACKWARD, True),
+        (Compatibility.BACKWARD_TRANSITIVE, False),
+        (Compatibility.FORWARD, True),
+        (Compatibility.FORWARD_TRANSITIVE, True),
+        (Compatibility.FULL, True),
+        (Compatibility.FULL_TRANSITIVE, False),
+    ],
+)
+def test_levels(level, ok):
+    # Age was added with a default, and is now being made required.
+    versions = [record(NAME), record(NAME, AGE_DEFAULT)]
+    problems = compatible(record(NAME, AGE), versions, level)
+    assert_that(not problems).is_equal_to(ok)
+
+
+def test_codec_check(app):
+    class Person(Record, avro_name="Person"):
+        name: str
+        age: int
+
+    topic = app.topic("people", value_type=Person)
+    codec = topic.schema.value_serializer
+    client = app.avro_schema_registry
+    client._ids["people-value", json.dumps(record(NAME).to_avro())] = 1
+    assert_that(codec.check(app, "people-value")).is_length(1)
+    assert_that(codec.check(app, "people-value", Compatibility.FORWARD)).is_empty()
+    assert_that(codec.versions).contains_key(1)
+
+    # Versions of other subjects the codec has seen don't count.
+    codec.versions[2] = record(name="Person")
+    assert_that(codec.check(app, "people-value", Compatibility.FORWARD)).is_empty()
+
+    # Nor does a subject with no cached versions pass unchecked.
+    assert_that(codec.check(app, "unknown-value")).is_equal_to(
+        ["No versions of unknown-value are cached to check against."]
+    )
+    client._fetched.add("unknown-value")
+    assert_that(codec.check(app, "unknown-value")).is_empty()
+
+    with patch.object(App, "tables", {}):
+        assert_that(app.check_schemas()).is_equal_to(
+            [("people-value", "Person.age: missing from Person and has no default.")]
+        )
+
+
+def test_codec_check_latest(app):
+    class Person(Record, avro_name="Person"):
+        name: str
+
+    codec = app.topic("people", value_type=Person).schema.value_serializer
+    client = app.avro_schema_registry
+    first = json.dumps(record(NAME, AGE).to_avro())
+    latest = json.dumps(record(NAME).to_avro())
+    # Subjects share ids, so a later version can have a lower id.
+    client._ids["people-value", first] = 2
+    client._numbers["people-value", first] = 1
+    client._ids["people-value", latest] = 1
+    client._numbers["people-value", latest] = 2
+    assert_that(codec.check(app, "people-value", Compatibility.FORWARD)).is_empty()
+    assert_that(
+        codec.check(app, "people-value", Compatibility.FORWARD_TRANSITIVE)
+    ).is_length(1)
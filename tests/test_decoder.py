@@ -0,0 +1,304 @@
+from copy import copy
+from datetime import datetime, timezone
+from decimal import Decimal
+from io import BytesIO
+from typing import Dict, List, Optional, Union
+
+import fastavro
+
+import pytest
+from assertpy import assert_that
+from faust_avro import CodecException, LazyRecord, Record
+from faust_avro.decoder import compile_decoder
+from faust_avro.encoder import compile_encoder
+from faust_avro.parsers.faust import parse
+from faust_avro.registry import Registry
+from faust_avro.schema import AvroEnum, AvroField, AvroRecord
+
+
+class Point(Record, avro_name="Point"):
+    x: int
+    y: int
+
+
+class Shape(Record, avro_name="Shape"):
+    name: str
+    points: List[Point]
+    tags: Dict[str, float]
+    center: Union[None, Point, str] = None
+    created: Optional[datetime] = None
+
+
+class Node(Record, avro_name="Node"):
+    value: str
+    next: Optional["Node"] = None
+
+
+def write(schema, data):
+    payload = BytesIO()
+    fastavro.schemaless_writer(payload, schema, data)
+    return payload.getvalue()
+
+
+def decode(writer_avsc, reader, data):
+    writer = Registry().parse(writer_avsc)
+    payload = write(writer_avsc, data)
+    value, pos = compile_decoder(writer, reader)(payload, 0)
+    assert_that(pos).is_equal_to(len(payload))
+    return value
+
+
+@pytest.fixture
+def shape(registry):
+    return parse(registry, Shape)
+
+
+def test_same_schema(shape):
+    created = datetime(2000, 1, 1, tzinfo=timezone.utc)
+    data = dict(
+        name="triangle",
+        points=[dict(x=0, y=0), dict(x=1, y=-1)],
+        tags=dict(area=0.5),
+        center=("Point", dict(x=1, y=2)),
+        created=created,
+    )
+    assert_that(decode(shape.to_avro(), shape, data)).is_equal_to(
+        Shape(
+            "triangle",
+            [Point(0, 0), Point(1, -1)],
+            dict(area=0.5),
+            Point(1, 2),
+            created,
+        )
+    )
+
+
+@pytest.mark.parametrize("center", [None, "middle"])
+def test_union_primitives(shape, center):
+    data = dict(name="", points=[], tags={}, center=center)
+    assert_that(decode(shape.to_avro(), shape, data).center).is_equal_to(center)
+
+
+def test_evolution(shape):
+    writer = dict(
+        type="record",
+        name="Shape",
+        fields=[
+            dict(name="name", type="string"),
+            dict(name="dropped", type=dict(type="array", items="string")),
+            dict(
+                name="points",
+                type=dict(
+                    type="array",
+                    items=dict(
+                        type="record",
+                        name="Point",
+                        fields=[dict(name="x", type="int"), dict(name="y", type="int")],
+                    ),
+                ),
+            ),
+            dict(name="tags", type=dict(type="map", values="int")),
+        ],
+    )
+    data = dict(
+        name="square", dropped=["a", "b"], points=[dict(x=1, y=1)], tags=dict(a=1)
+    )
+    result = decode(writer, shape, data)
+    assert_that(result).is_equal_to(Shape("square", [Point(1, 1)], dict(a=1.0)))
+    assert_that(result.tags["a"]).is_type_of(float)
+
+
+def test_missing_default(registry):
+    writer = dict(type="record", name="Point", fields=[dict(name="x", type="long")])
+    with pytest.raises(CodecException):
+        compile_decoder(Registry().parse(writer), parse(registry, Point))
+
+
+def test_enum_default():
+    writer = dict(type="enum", name="Suit", symbols=["hearts", "jokers"])
+    reader = dict(type="enum", name="Suit", symbols=["hearts"], default="hearts")
+    decoder = compile_decoder(Registry().parse(writer), Registry().parse(reader))
+    assert_that(decoder(b"\x02", 0)).is_equal_to(("hearts", 1))
+
+
+def test_recursive(registry):
+    reader = parse(registry, Node)
+    data = dict(value="one", next=dict(value="two", next=None))
+    assert_that(decode(reader.to_avro(), reader, data)).is_equal_to(
+        Node("one", Node("two"))
+    )
+
+
+def test_writer_only(shape):
+    data = dict(name="", points=[dict(x=3, y=4)], tags={}, center=None)
+    assert_that(decode(shape.to_avro(), None, data)).is_equal_to(
+        dict(data, created=None)
+    )
+
+
+def test_skip():
+    writer = dict(
+        type="record",
+        name="Wide",
+        fields=[
+            dict(name="flag", type="boolean"),
+            dict(name="label", type="string"),
+            dict(name="weights", type=dict(type="array", items="double")),
+            dict(name="shape", type=Shape.to_avro(Registry())),
+            dict(name="shapes", type=dict(type="map", values="Shape")),
+            dict(name="suit", type=dict(type="enum", name="S", symbols=["a", "b"])),
+            dict(name="hash", type=dict(type="fixed", name="H", size=4)),
+            dict(name="when", type=dict(type="int", logicalType="date")),
+            dict(name="either", type=["null", "long", "Shape"]),
+            dict(name="x", type="int"),
+            dict(name="y", type="long"),
+        ],
+    )
+    reader = dict(
+        type="record",
+        name="Wide",
+        fields=[dict(name="x", type="int"), dict(name="y", type="long")],
+    )
+    shape = dict(name="s", points=[dict(x=1, y=2)], tags=dict(a=1.0), center="c")
+    data = dict(
+        flag=True,
+        label="label",
+        weights=[0.5, 1.5],
+        shape=shape,
+        shapes=dict(one=shape, two=shape),
+        suit="b",
+        hash=b"\x00\x01\x02\x03",
+        when=datetime(2000, 1, 1).date(),
+        either=shape,
+        x=-1,
+        y=2**40,
+    )
+    assert_that(decode(writer, Registry().parse(reader), data)).is_equal_to(
+        dict(x=-1, y=2**40)
+    )
+
+
+def test_skip_sized_blocks(registry):
+    writer = dict(
+        type="record",
+        name="Point",
+        fields=[
+            dict(name="words", type=dict(type="array", items="string")),
+            dict(name="x", type="int"),
+            dict(name="y", type="int"),
+        ],
+    )
+    # One block of two strings, written with a negative count and its size.
+    payload = b"\x03\x08\x02a\x02b\x00\x02\x04"
+    decoder = compile_decoder(Registry().parse(writer), parse(registry, Point))
+    assert_that(decoder(payload, 0)).is_equal_to((Point(1, 2), len(payload)))
+
+
+def test_projection(registry):
+    data = dict(name="n", points=[dict(x=1, y=2)], tags=dict(a=1.0), center=None)
+    reader = parse(Registry(), Shape.project("name", "center"))
+    result = decode(Shape.to_avro(Registry()), reader, data)
+    assert_that(result.asdict()).is_equal_to(dict(name="n", center=None))
+    assert_that(Shape.project("name", "center")).is_same_as(type(result))
+
+
+class LazyPoint(LazyRecord, avro_name="Point"):
+    x: int
+    y: int
+
+
+class LazyShape(LazyRecord, avro_name="Shape"):
+    name: str
+    points: List[LazyPoint]
+    extra: str = "default"
+
+
+def test_lazy(shape):
+    data = dict(name="lazy", points=[dict(x=1, y=2)], tags={}, center=None)
+    result = decode(shape.to_avro(), parse(Registry(), LazyShape), data)
+
+    assert_that(result).is_instance_of(LazyShape)
+    assert_that(result.__dict__).does_not_contain_key("name", "points")
+    assert_that(result.name).is_equal_to("lazy")
+    assert_that(result.__dict__).contains_key("name").does_not_contain_key("points")
+    assert_that(result.__dict__.buf).is_not_none()
+
+    assert_that(result).is_equal_to(LazyShape("lazy", [LazyPoint(1, 2)]))
+    assert_that(result.__dict__.buf).is_none()
+    assert_that(result.asdict()).is_equal_to(
+        dict(name="lazy", points=[LazyPoint(1, 2)], extra="default")
+    )
+
+
+def test_lazy_repr_and_copy(shape):
+    data = dict(name="lazy", points=[], tags={}, center=None)
+    result = decode(shape.to_avro(), parse(Registry(), LazyShape), data)
+    assert_that(copy(result)).is_equal_to(result)
+    assert_that(repr(result)).contains("name='lazy'", "points=[]")
+
+
+@pytest.mark.parametrize(
+    "decimal",
+    [
+        dict(type="bytes", logicalType="decimal", precision=10, scale=2),
+        dict(
+            type="fixed", name="D", size=8, logicalType="decimal", precision=10, scale=2
+        ),
+    ],
+)
+def test_decimal(decimal):
+    writer = dict(
+        type="record", name="Price", fields=[dict(name="amount", type=decimal)]
+    )
+    value = decode(writer, None, dict(amount=Decimal("12.34")))
+    assert_that(value).is_equal_to(dict(amount=Decimal("12.34")))
+
+
+def nested(levels, annotation=int):
+    """List[Dict[str, Optional[...]]], levels deep."""
+    for _ in range(levels):
+        annotation = List[Dict[str, Optional[annotation]]]  # type: ignore
+    return annotation
+
+
+class Deep(Record, avro_name="Deep"):
+    value: nested(10)  # type: ignore
+    x: int = 0
+
+
+def test_deeply_nested(registry):
+    value = 1
+    for _ in range(10):
+        value = [dict(some=value, none=None)]
+    reader = parse(registry, Deep)
+    data = dict(value=value, x=2)
+    assert_that(decode(reader.to_avro(), reader, data)).is_equal_to(Deep(value, 2))
+    # And skipped over, by a reader without the field.
+    skipping = dict(type="record", name="Deep", fields=[dict(name="x", type="long")])
+    assert_that(decode(reader.to_avro(), Registry().parse(skipping), data)).is_equal_to(
+        dict(x=2)
+    )
+
+
+def test_deep_records():
+    schema = "int"
+    for level in range(2000):
+        inner = dict(name="inner", type=["null", schema])
+        schema = dict(type="record", name=f"Level{level}", fields=[inner])
+    writer = Registry().parse(schema)
+    data = dict(inner=dict(inner=None))
+    payload = bytearray()
+    compile_encoder(writer)(data, payload)
+    assert_that(compile_decoder(writer)(payload, 0)).is_equal_to((data, len(payload)))
+
+
+def test_names_not_code(capsys):
+    # Names which didn't come through the avro parser are never executed.
+    name = "X\n    print('INJECTED') #it's"
+    writer = AvroRecord(name, fields=[AvroField("e", AvroEnum(name, symbols=["a"]))])
+    reader = AvroRecord(name, fields=[AvroField("e", AvroEnum(name, symbols=["b"]))])
+    decoder = compile_decoder(writer, reader)
+    with pytest.raises(CodecException, match="symbol unknown"):
+        decoder(b"\x00", 0)
+    compile_encoder(writer)(dict(e="a"), bytearray())
+    assert_that(capsys.readouterr().out).is_empty()
@@ -0,0 +1,156 @@
+from datetime import date, datetime, time, timezone
+from decimal import Decimal
+from enum import Enum
+from io import BytesIO
+from typing import Dict, List, Optional, Union
+from uuid import UUID
+
+import fastavro
+from faust.models.fields import DecimalField
+
+import pytest
+from assertpy import assert_that
+from faust_avro import Record
+from faust_avro.encoder import compile_encoder
+from faust_avro.parsers.faust import parse
+from faust_avro.types import float32, int32
+
+
+class Suit(Enum):
+    hearts = 0
+    spades = 1
+
+
+class Card(Record):
+    suit: Suit
+    rank: int32
+
+
+class Node(Record):
+    value: str
+    next: Optional["Node"] = None
+
+
+class Everything(Record):
+    boolean: bool
+    integer: int32
+    longint: int
+    floating_pt: float32
+    double: float
+    byte_string: bytes
+    text_string: str
+    suit: Suit
+    words: List[str]
+    counts: Dict[str, int]
+    numeric: Union[int, float]
+    usd: Decimal = DecimalField(max_digits=20, max_decimal_places=2)  # type: ignore
+    calendar_date: date
+    daily_time: time
+    timestamp: datetime
+    uuid: UUID
+    optional: Optional[str] = None
+    cards: List[Card] = []
+
+
+def roundtrip(registry, record):
+    schema = parse(registry, type(record))
+    buf = bytearray()
+    compile_encoder(schema)(record, buf)
+    return fastavro.schemaless_reader(BytesIO(buf), schema.to_avro())
+
+
+def test_primitives(registry):
+    record = Everything(
+        boolean=True,
+        integer=-42,
+        longint=2**40,
+        floating_pt=0.5,
+        double=-1.25,
+        byte_string=b"\x00\xff",
+        text_string="unicode \N{SNOWMAN}",
+        suit=Suit.spades,
+        words=["a", "b"],
+        counts=dict(x=1, y=-1),
+        numeric=0.5,
+        usd=Decimal("12.34"),
+        calendar_date=date(2000, 1, 1),
+        daily_time=time(12, 0),
+        timestamp=datetime(2000, 1, 1, tzinfo=timezone.utc),
+        uuid=UUID(int=1),
+        cards=[Card("hearts", 10)],
+    )
+    assert_that(roundtrip(registry, record)).is_equal_to(
+        dict(
+            boolean=True,
+            integer=-42,
+            longint=2**40,
+            floating_pt=0.5,
+            double=-1.25,
+            byte_string=b"\x00\xff",
+            text_string="unicode \N{SNOWMAN}",
+            suit="spades",
+            words=["a", "b"],
+            counts=dict(x=1, y=-1),
+            numeric=0.5,
+            usd=Decimal("12.34"),
+            calendar_date=date(2000, 1, 1),
+            daily_time=time(12, 0),
+            timestamp=datetime(2000, 1, 1, tzinfo=timezone.utc),
+            uuid=UUID(int=1),
+            optional=None,
+            cards=[dict(suit="hearts", rank=10)],
+        )
+    )
+
+
+@pytest.mark.parametrize("numeric", [1, 0.5])
+def test_union_branches(registry, numeric):
+    now = datetime.now(timezone.utc)
+    record = Everything(
+        *(True, 0, 0, 0.0, 0.0, b"", "", Suit.hearts, [], {}, numeric, Decimal(0)),
+        *(now.date(), now.time(), now, UUID(int=0)),
+    )
+    assert_that(roundtrip(registry, record)["numeric"]).is_equal_to(numeric)
+    assert_that(roundtrip(registry, record)["numeric"]).is_type_of(type(numeric))
+
+
+def test_recursive(registry):
+    record = Node("one", Node("two", Node("three")))
+    result = roundtrip(registry, record)
+    assert_that(result["next"]["next"]).is_equal_to(dict(value="three", next=None))
+
+
+def nested(levels, annotation=int):
+    """List[Dict[str, Optional[...]]], levels deep."""
+    for _ in range(levels):
+        annotation = List[Dict[str, Optional[annotation]]]  # type: ignore
+    return annotation
+
+
+class Deep(Record):
+    value: nested(12)  # type: ignore
+
+
+def test_deeply_nested(registry):
+    value = 1
+    for _ in range(12):
+        value = [dict(some=value, none=None)]
+    assert_that(roundtrip(registry, Deep(value))).is_equal_to(dict(value=value))
+
+
+def test_matches_fastavro(registry):
+    record = Card(Suit.hearts, 1)
+    schema = parse(registry, Card)
+    buf = bytearray()
+    compile_encoder(schema)(record, buf)
+
+    expected = BytesIO()
+    fastavro.schemaless_writer(expected, schema.to_avro(), dict(suit="hearts", rank=1))
+    assert_that(bytes(buf)).is_equal_to(expected.getvalue())
+
+
+def test_mapping(registry):
+    schema = parse(registry, Card)
+    buf = bytearray()
+    compile_encoder(schema)(dict(suit="spades", rank=2), buf)
+    assert_that(bytes(buf)).is_equal_to(b"\x02\x04")
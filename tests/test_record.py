@@ -1,9 +1,14 @@
+import gc
+import json
+import tempfile
+import weakref
 from typing import List, Union
 
 import pytest
 from assertpy import assert_that
-from faust_avro import Record
+from faust_avro import App, Record
 from faust_avro import context as ctx
+from faust_avro.registry import Registry
 from faust_avro.serializers import Codec
 
 
@@ -50,3 +55,36 @@ def test_records(app, asr_sync, asr_schema_by_id, record):
         codec.schema_id = None
         deser = Model.loads(ser, serializer=codec)
         assert_that(deser).is_equal_to(record)
+
+
+def test_avro_forms_cached():
+    registry = Registry()
+    assert_that(Outer.to_avro(registry)).is_same_as(Outer.to_avro(registry))
+    forms = Outer._avro_forms(registry)
+    assert_that(forms.schema).is_same_as(registry[Outer])
+    assert_that(json.loads(forms.json)).is_equal_to(forms.dict)
+    assert_that(Outer._avro_forms(Registry())).is_not_same_as(forms)
+
+
+def test_avro_forms_collected():
+    registry = Registry()
+    Inner.to_avro(registry)
+    assert_that(Inner._avro_forms_cache).contains_key(id(registry))
+    key = id(registry)
+    del registry
+    gc.collect()
+    assert_that(Inner._avro_forms_cache).does_not_contain_key(key)
+
+
+def test_codec_keeps_no_app():
+    with tempfile.TemporaryDirectory() as temp:
+        app = App("collected", datadir=temp)
+        codec = Codec(Inner)
+        assert_that(codec.schema(app)).is_equal_to(
+            json.dumps(Inner.to_avro(app.avro_schema_registry.registry))
+        )
+        codec.encoder(app)
+        collected = weakref.ref(app)
+        del app
+        gc.collect()
+        assert_that(collected()).is_none()
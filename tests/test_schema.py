@@ -0,0 +1,107 @@
+import sys
+from copy import copy
+from importlib import import_module
+from typing import Optional
+from unittest.mock import patch
+
+from fastavro.schema import fingerprint, to_parsing_canonical_form
+
+import pytest
+from assertpy import assert_that
+from faust_avro import Record
+from faust_avro import schema as schema_module
+from faust_avro.compatibility import can_read
+from faust_avro.registry import Registry
+from faust_avro.schema import AvroField, AvroRecord
+from faust_avro.walk import dumps
+
+
+class Plain(Record):
+    x: int
+
+
+class Node(Record, avro_name="Node"):
+    value: str
+    next: Optional["Node"] = None
+
+
+SHAPE = dict(
+    type="record",
+    name="Shape",
+    namespace="geo",
+    doc="Dropped from the canonical form.",
+    fields=[
+        dict(name="name", type="string", doc="Also dropped.", default=""),
+        dict(name="when", type=dict(type="long", logicalType="timestamp-millis")),
+        dict(name="suit", type=dict(type="enum", name="S", symbols=["a"], default="a")),
+        dict(name="hash", type=dict(type="fixed", name="H", namespace="x", size=4)),
+        dict(name="tags", type=dict(type="map", values=["null", "S"])),
+        dict(name="nested", type=dict(type="string")),
+        dict(name="self", type=["null", "Shape"]),
+    ],
+)
+
+
+@pytest.mark.parametrize("avsc", ["int", SHAPE, Node.to_avro(Registry())])
+def test_matches_fastavro(avsc):
+    schema = Registry().parse(avsc)
+    assert_that(schema.canonical_form).is_equal_to(to_parsing_canonical_form(avsc))
+    assert_that(schema.fingerprint.to_bytes(8, "little").hex()).is_equal_to(
+        fingerprint(to_parsing_canonical_form(avsc), "CRC-64-AVRO")
+    )
+
+
+def test_cached():
+    schema = Registry().parse(SHAPE)
+    assert_that(schema.canonical_form).is_same_as(schema.canonical_form)
+    assert_that(schema.fingerprint).is_equal_to(schema.fingerprint)
+    assert_that(schema.__dict__).contains_key("_canonical_form", "_fingerprint")
+    assert_that(repr(schema)).does_not_contain("_fingerprint")
+
+
+def test_changed():
+    schema = AvroRecord(name="Growing")
+    empty = schema.fingerprint
+    schema.fields = [AvroField("x", Registry()["int"])]
+    assert_that(schema.fingerprint).is_equal_to(empty)
+    schema.invalidate()
+    assert_that(schema.fingerprint).is_not_equal_to(empty)
+    assert_that(schema.canonical_form).contains('"name":"x"')
+
+
+def test_python_type_lazy():
+    foreign = dict(type="record", name="com.example.Foreign", fields=[])
+    with patch.object(schema_module, "import_module", wraps=import_module) as imp:
+        schema = Registry().parse(foreign)
+        repr(schema)
+        assert_that(imp.called).is_false()
+
+        assert_that(schema.python_type).is_none()
+        assert_that(schema.resolve_python_type()).is_none()
+        assert_that(schema.resolve_python_type()).is_none()
+        assert_that(imp.call_count).is_equal_to(1)
+    assert_that(copy(schema).resolve_python_type()).is_none()
+
+
+def test_python_type_resolved():
+    plain = Registry().parse(Plain.to_avro(Registry()))
+    assert_that(plain.resolve_python_type()).is_same_as(Plain)
+
+    suit = Registry().parse(dict(type="enum", name="Suit", symbols=["a", "b"]))
+    assert_that(repr(suit)).does_not_contain("python_type")
+    python_type = suit.resolve_python_type()
+    assert_that(suit.resolve_python_type()).is_same_as(python_type)
+    assert_that([member.name for member in python_type]).is_equal_to(["a", "b"])
+
+
+def test_deep():
+    avsc = "int"
+    for _ in range(sys.getrecursionlimit() * 2):
+        avsc = dict(type="map", values=dict(type="array", items=avsc))
+    schema = Registry().parse(avsc)
+
+    # Comparing the nested dicts directly would recurse, so compare as json.
+    assert_that(dumps(schema.to_avro())).is_equal_to(dumps(avsc))
+    assert_that(schema.canonical_form).is_equal_to(dumps(avsc))
+    assert_that(schema.structural_fingerprint).is_instance_of(int)
+    assert_that(can_read(schema, Registry().parse(avsc))).is_empty()
@@ -1,13 +1,25 @@
 import json
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+from io import BytesIO
+from typing import List
+from unittest.mock import patch
 
+import fastavro
+import faust
 from faust.exceptions import ValueDecodeError
 from faust.types.tuples import Message
 
 import pytest
 from assertpy import assert_that
-from faust_avro import Record
+from faust_avro import LazyRecord, Record
 from faust_avro import context as ctx
+from faust_avro import record as record_module
+from faust_avro import serializers
+from faust_avro.asyncio import SchemaNotFound
+from faust_avro.decoder import compile_decoder
+from faust_avro.encoder import compile_encoder
+from faust_avro.registry import Registry
+from faust_avro.serializers import HEADER, SINGLE_OBJECT_HEADER, SingleObjectCodec
 
 
 class Key(Record):
@@ -20,6 +32,12 @@ class Person(Record):
     birth: datetime
 
 
+def fastavro_write(schema, data):
+    payload = BytesIO()
+    fastavro.schemaless_writer(payload, schema, data)
+    return payload.getvalue()
+
+
 @pytest.fixture
 def topic(app):
     t = app.topic("people", key_type=Key, value_type=Person)
@@ -67,3 +85,371 @@ def test_schema(app, topic):
         )
     )
     assert_that(topic.schema.key_serializer.schema(app)).is_equal_to(key)
+
+
+def test_compiled_once(app, topic):
+    v = Person("Unit Test", 0, datetime(1970, 1, 1, 0, 0, 0, 0, timezone.utc))
+
+    with patch.object(record_module, "compile_encoder", wraps=compile_encoder) as enc:
+        with patch.object(serializers, "compile_decoder", wraps=compile_decoder) as dec:
+            for _ in range(3):
+                payload, headers = topic.prepare_value(v, None)
+                message = Message("ut-topic", 0, 0, 0, 0, None, None, payload, None)
+                assert_that(topic.schema.loads_value(app, message)).is_equal_to(v)
+
+            # Other codecs of the record share its encoder.
+            other = app.topic("others", value_type=Person)
+            other.schema.value_serializer.schema_id = 1
+            other.prepare_value(v, None)
+
+    assert_that(enc.call_count).is_equal_to(1)
+    assert_that(dec.call_count).is_equal_to(1)
+
+
+def test_compiled_per_writer(app, topic, asr_schema_by_id):
+    def person(birth):
+        fields = [
+            dict(name="name", type="string"),
+            dict(name="age", type="long"),
+            dict(name="birth", type=dict(type="long", logicalType=birth)),
+        ]
+        return json.dumps(dict(type="record", name="Person", fields=fields))
+
+    # The same canonical form, but 7 and 8 differ in their logical types.
+    writers = {
+        7: person("timestamp-millis"),
+        8: person("timestamp-micros"),
+        9: person("timestamp-micros"),
+    }
+    asr_schema_by_id.side_effect = writers.get
+    births = dict()
+    with patch.object(serializers, "compile_decoder", wraps=compile_decoder) as dec:
+        for schema_id in writers:
+            payload = HEADER.pack(0, schema_id) + fastavro_write(
+                json.loads(writers[schema_id]), dict(name="", age=0, birth=5000)
+            )
+            message = Message("ut-topic", 0, 0, 0, 0, None, None, payload, None)
+            births[schema_id] = topic.schema.loads_value(app, message).birth
+
+    assert_that(dec.call_count).is_equal_to(2)
+    epoch = datetime(1970, 1, 1, tzinfo=timezone.utc)
+    assert_that(births).is_equal_to(
+        {
+            7: epoch + timedelta(milliseconds=5000),
+            8: epoch + timedelta(microseconds=5000),
+            9: epoch + timedelta(microseconds=5000),
+        }
+    )
+
+
+@pytest.mark.parametrize("buffer", [bytes, bytearray, memoryview])
+def test_loads_buffer(app, topic, buffer):
+    v = Person("Unit Test", 0, datetime(1970, 1, 1, 0, 0, 0, 0, timezone.utc))
+    payload, headers = topic.prepare_value(v, None)
+    with ctx.context(ctx.app, app), ctx.context(ctx.subject, "ut-topic-value"):
+        record = topic.schema.value_serializer.loads(buffer(payload))
+    assert_that(record).is_equal_to(v)
+
+
+def test_dumps_into(app, topic):
+    v = Person("Unit Test", 0, datetime(1970, 1, 1, 0, 0, 0, 0, timezone.utc))
+    codec = topic.schema.value_serializer
+    buffer = bytearray(b"prefix")
+    with ctx.context(ctx.app, app), ctx.context(ctx.subject, "ut-topic-value"):
+        size = codec.dumps_into(v, buffer)
+        assert_that(codec.dumps_into(v, buffer)).is_equal_to(size)
+        payload = codec.dumps(v)
+
+    assert_that(size).is_equal_to(len(payload))
+    assert_that(bytes(buffer)).is_equal_to(b"prefix" + payload + payload)
+
+
+def test_dumps_many(app, topic):
+    people = [Person(f"Person {i}", i, datetime.now(timezone.utc)) for i in range(3)]
+    codec = topic.schema.value_serializer
+    with ctx.context(ctx.app, app), ctx.context(ctx.subject, "ut-topic-value"):
+        payloads = codec.dumps_many(people)
+        assert_that(payloads).is_equal_to([codec.dumps(p) for p in people])
+
+
+@pytest.mark.asyncio
+async def test_send_many(app, topic):
+    people = [Person(f"Person {i}", i, datetime.now(timezone.utc)) for i in range(3)]
+    keys = [Key(i) for i in range(3)]
+
+    headers = dict(source=b"unit test")
+    with patch.object(topic, "send", spec=True) as send:
+        await topic.send_many(people, keys=keys, headers=headers)
+
+    sent = [(call.kwargs["key"], call.kwargs["value"]) for call in send.call_args_list]
+    # Each message gets its own headers, as faust adds to them in place.
+    sent_headers = [call.kwargs["headers"] for call in send.call_args_list]
+    assert_that(sent_headers).is_equal_to([headers] * 3)
+    assert_that({id(h) for h in sent_headers + [headers]}).is_length(4)
+    assert_that(sent).is_equal_to(
+        [
+            (topic.prepare_key(k, None)[0], topic.prepare_value(p, None)[0])
+            for k, p in zip(keys, people)
+        ]
+    )
+    assert_that(topic.prepare_value(sent[0][1], None)).is_equal_to((sent[0][1], None))
+
+
+def test_loads_many(app, topic, asr_schema_by_id):
+    writer = dict(
+        type="record",
+        name="Person",
+        fields=[dict(name=f, type="string") for f in ("name", "nickname")]
+        + [dict(name="age", type="long")]
+        + [dict(name="birth", type=dict(type="long", logicalType="timestamp-micros"))],
+    )
+    asr_schema_by_id.return_value = json.dumps(writer)
+    old = HEADER.pack(0, 7) + fastavro_write(
+        writer, dict(name="Old", nickname="o", age=1, birth=0)
+    )
+
+    birth = datetime(1970, 1, 1, 0, 0, 0, 0, timezone.utc)
+    people = [Person(f"Person {i}", i, birth) for i in range(3)]
+    new = [topic.prepare_value(p, None)[0] for p in people]
+    messages = [
+        Message("ut-topic", 0, 0, 0, 0, None, None, payload, None)
+        for payload in (new[0], old, new[1], old, new[2])
+    ]
+
+    records = topic.schema.loads_values(app, messages)
+    assert_that(records).is_equal_to(
+        [
+            people[0],
+            Person("Old", 1, birth),
+            people[1],
+            Person("Old", 1, birth),
+            people[2],
+        ]
+    )
+    asr_schema_by_id.assert_called_once_with(7)
+
+
+def test_loads_many_errors(app, topic):
+    birth = datetime(1970, 1, 1, 0, 0, 0, 0, timezone.utc)
+    person = Person("Person", 0, birth)
+    good = topic.prepare_value(person, None)[0]
+    messages = [
+        Message("ut-topic", 0, 0, 0, 0, None, None, payload, None)
+        for payload in (b"\x01" + good[1:], good[:-1], good)
+    ]
+
+    bad_magic, truncated, ok = topic.schema.loads_values(app, messages)
+    assert_that(bad_magic).is_instance_of(ValueDecodeError)
+    assert_that(str(bad_magic)).contains("Bad magic byte")
+    assert_that(truncated).is_instance_of(ValueDecodeError)
+    assert_that(truncated.__cause__).is_not_none()
+    assert_that(ok).is_equal_to(person)
+
+
+def test_projection(app, topic):
+    v = Person("Unit Test", 0, datetime(1970, 1, 1, 0, 0, 0, 0, timezone.utc))
+    payload, headers = topic.prepare_value(v, None)
+
+    projected = app.topic(
+        "people", value_type=Person, value_serializer=serializers.Codec(Person, ["age"])
+    )
+    projected.schema.value_serializer.schema_id = 1
+    message = Message("ut-topic", 0, 0, 0, 0, None, None, payload, None)
+    record = projected.schema.loads_value(app, message)
+    assert_that(record).is_equal_to(Person.project("age")(0))
+
+
+class LazyPerson(LazyRecord):
+    name: str
+    age: int
+
+
+def test_lazy(app):
+    topic = app.topic("lazy-people", value_type=LazyPerson)
+    codec = topic.schema.value_serializer
+    codec.schema_id = 2
+    with ctx.context(ctx.topic, topic):
+        payload, headers = topic.prepare_value(LazyPerson("Unit Test", 0), None)
+    message = Message("lazy-people", 0, 0, 0, 0, None, None, payload, None)
+    record = topic.schema.loads_value(app, message)
+    assert_that(record.__dict__).does_not_contain_key("name", "age")
+    assert_that(record).is_equal_to(LazyPerson("Unit Test", 0))
+    # Nothing is kept to forward the record, unless asked for.
+    assert_that(record.__dict__.decoded).is_none()
+    assert_that(record.__dict__.buf).is_none()
+
+
+class Team(Record, avro_forward=True):
+    members: List[str]
+    lead: Key
+
+
+@pytest.fixture
+def forwarding():
+    with patch.object(Person, "_avro_forward", True):
+        with patch.object(LazyPerson, "_avro_forward", True):
+            yield
+
+
+def test_forward_off(app, topic):
+    v = Person("Unit Test", 0, datetime(1970, 1, 1, 0, 0, 0, 0, timezone.utc))
+    payload, headers = topic.prepare_value(v, None)
+    message = Message("ut-topic", 0, 0, 0, 0, None, None, payload, None)
+    record = topic.schema.loads_value(app, message)
+    assert_that(record.__dict__).does_not_contain_key("__avro_source__")
+    assert_that(topic.prepare_value(record, None)[0]).is_not_same_as(payload)
+
+
+@pytest.mark.usefixtures("forwarding")
+def test_forward(app, topic):
+    v = Person("Unit Test", 0, datetime(1970, 1, 1, 0, 0, 0, 0, timezone.utc))
+    payload, headers = topic.prepare_value(v, None)
+    message = Message("ut-topic", 0, 0, 0, 0, None, None, payload, None)
+    record = topic.schema.loads_value(app, message)
+
+    codec = topic.schema.value_serializer
+    with patch.object(codec, "encoder", spec=True) as encoder:
+        forwarded, headers = topic.prepare_value(record, None)
+    assert_that(forwarded).is_same_as(payload)
+    encoder.assert_not_called()
+
+    record.age = 1
+    with patch.object(codec, "forwardable", wraps=codec.forwardable) as forwardable:
+        changed, headers = topic.prepare_value(record, None)
+    forwardable.assert_called_once_with(record)
+    message = Message("ut-topic", 0, 0, 0, 0, None, None, changed, None)
+    assert_that(topic.schema.loads_value(app, message).age).is_equal_to(1)
+
+
+@pytest.mark.parametrize(
+    "change",
+    [
+        lambda team: team.members.append("b"),
+        lambda team: setattr(team.lead, "idx", 2),
+        lambda team: setattr(team, "lead", Key(2)),
+    ],
+)
+def test_forward_changed_in_place(app, change):
+    topic = app.topic("teams", value_type=Team)
+    topic.schema.value_serializer.schema_id = 3
+    with ctx.context(ctx.topic, topic):
+        payload, headers = topic.prepare_value(Team(["a"], Key(1)), None)
+        message = Message("teams", 0, 0, 0, 0, None, None, payload, None)
+        record = topic.schema.loads_value(app, message)
+        assert_that(topic.prepare_value(record, None)[0]).is_same_as(payload)
+
+        change(record)
+        changed, headers = topic.prepare_value(record, None)
+        message = Message("teams", 0, 0, 0, 0, None, None, changed, None)
+    assert_that(topic.schema.loads_value(app, message)).is_equal_to(record)
+    assert_that(changed).is_not_equal_to(payload)
+
+
+@pytest.mark.usefixtures("forwarding")
+def test_forward_other_schema(app, topic):
+    v = Person("Unit Test", 0, datetime(1970, 1, 1, 0, 0, 0, 0, timezone.utc))
+    payload, headers = topic.prepare_value(v, None)
+    message = Message("ut-topic", 0, 0, 0, 0, None, None, payload, None)
+    record = topic.schema.loads_value(app, message)
+
+    topic.schema.value_serializer.schema_id = 2
+    forwarded, headers = topic.prepare_value(record, None)
+    assert_that(forwarded).is_not_equal_to(payload)
+    assert_that(forwarded[5:]).is_equal_to(payload[5:])
+
+
+@pytest.mark.usefixtures("forwarding")
+def test_forward_lazy(app):
+    topic = app.topic("lazy-people", value_type=LazyPerson)
+    topic.schema.value_serializer.schema_id = 2
+    with ctx.context(ctx.topic, topic):
+        payload, headers = topic.prepare_value(LazyPerson("Unit Test", 0), None)
+        message = Message("lazy-people", 0, 0, 0, 0, None, None, payload, None)
+        record = topic.schema.loads_value(app, message)
+
+        assert_that(record.name).is_equal_to("Unit Test")
+        assert_that(topic.prepare_value(record, None)[0]).is_same_as(payload)
+        record.age = 1
+        assert_that(topic.prepare_value(record, None)[0]).is_not_equal_to(payload)
+
+
+@pytest.mark.asyncio
+async def test_prefetch(app, topic, asr_schema_by_id):
+    asr_schema_by_id.return_value = topic.schema.value_serializer.schema(app)
+    v = Person("Unit Test", 0, datetime(1970, 1, 1, 0, 0, 0, 0, timezone.utc))
+    payload, headers = topic.prepare_value(v, None)
+    payload = HEADER.pack(0, 9) + payload[HEADER.size :]
+    key, headers = topic.prepare_key(Key(1), None)
+    message = Message("ut-topic", 0, 0, 0, 0, None, key, payload, None)
+
+    decode = topic.schema.compile(app)
+    with patch.object(serializers, "run_in_thread") as run_in_thread:
+        event = await decode(message, propagate=True)
+    assert_that(event.key).is_equal_to(Key(1))
+    assert_that(event.value).is_equal_to(v)
+    asr_schema_by_id.assert_awaited_once_with(9)
+    run_in_thread.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_prefetch_error(app, topic, asr_schema_by_id):
+    asr_schema_by_id.side_effect = SchemaNotFound(9)
+    message = Message("ut-topic", 0, 0, 0, 0, None, None, HEADER.pack(0, 9), None)
+    with pytest.raises(ValueDecodeError):
+        await topic.schema.compile(app)(message, propagate=True)
+
+
+@pytest.mark.asyncio
+async def test_send_syncs(app, asr_sync):
+    asr_sync.return_value = 5
+    topic = app.topic("unsynced", value_type=Person)
+    v = Person("Unit Test", 0, datetime(1970, 1, 1, 0, 0, 0, 0, timezone.utc))
+    with patch.object(faust.Topic, "send") as send:
+        with patch.object(serializers, "run_in_thread") as run_in_thread:
+            await topic.send(value=v)
+    assert_that(topic.schema.value_serializer.schema_id).is_equal_to(5)
+    send.assert_awaited_once_with(value=v)
+    run_in_thread.assert_not_called()
+
+
+def test_single_object(app, tmp_path):
+    class Pet(Record, avro_name="Pet"):
+        name: str
+        age: int = 0
+
+    codec = SingleObjectCodec(Pet)
+    pets = app.topic("pets", value_type=Pet, value_serializer=codec)
+    assert_that(pets.schema.value_serializer).is_same_as(codec)
+
+    old = dict(type="record", name="Pet", fields=[dict(name="name", type="string")])
+    (tmp_path / "old.avsc").write_text(json.dumps(old))
+    app.avro_schema_store.load(tmp_path)
+    old_fingerprint = Registry().parse(old).fingerprint
+    payload = SINGLE_OBJECT_HEADER.pack(b"\xc3\x01", old_fingerprint)
+    payload += fastavro_write(old, dict(name="Rex"))
+
+    with ctx.context(ctx.app, app), ctx.context(ctx.subject, "pets-value"):
+        encoded = codec.dumps(Pet("Tom", 3))
+        assert_that(encoded[:2]).is_equal_to(b"\xc3\x01")
+        assert_that(codec.loads(encoded)).is_equal_to(Pet("Tom", 3))
+        assert_that(codec.loads(payload)).is_equal_to(Pet("Rex"))
+
+        unknown = SINGLE_OBJECT_HEADER.pack(b"\xc3\x01", 1) + encoded[10:]
+        with pytest.raises(SchemaNotFound):
+            codec.loads(unknown)
+
+    assert_that(Registry().parse(Pet.to_avro(Registry())).fingerprint).is_equal_to(
+        int.from_bytes(encoded[2:10], "little")
+    )
+
+
+@pytest.mark.asyncio
+async def test_single_object_no_registry(app, asr_sync):
+    class Pet(Record, avro_name="Pet"):
+        name: str
+
+    pets = app.topic("pets", value_type=Pet, value_serializer=SingleObjectCodec(Pet))
+    await pets.schema.ready(app, pets)
+    assert_that(pets.schema.value_serializer.schema_id).is_not_none()
+    assert_that(app.avro_schema_store).is_length(1)
+    assert_that(asr_sync.await_count).is_zero()
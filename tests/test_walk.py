@@ -0,0 +1,75 @@
+import contextvars
+import json
+import sys
+
+import pytest
+from assertpy import assert_that
+from faust_avro.walk import MAX_DEPTH, dumps, fresh_stack
+
+
+def depth(data, level=0):
+    if level > MAX_DEPTH:
+        return fresh_stack(depth, data)
+    if isinstance(data, list):
+        return 1 + depth(data[0], level + 1) if data else 1
+    return 0
+
+
+def nested(n):
+    data = []
+    for _ in range(n):
+        data = [data]
+    return data
+
+
+def test_fresh_stack():
+    assert_that(fresh_stack(depth, nested(3))).is_equal_to(4)
+    assert_that(fresh_stack(dict, a=1)).is_equal_to(dict(a=1))
+
+
+def test_fresh_stack_deep():
+    n = sys.getrecursionlimit() * 2
+    assert_that(depth(nested(n))).is_equal_to(n + 1)
+
+
+def test_fresh_stack_raises():
+    def fail():
+        raise KeyError("bottom")
+
+    with pytest.raises(KeyError, match="bottom"):
+        fresh_stack(fail)
+
+
+def test_fresh_stack_context():
+    var = contextvars.ContextVar("var")
+    var.set("value")
+    assert_that(fresh_stack(var.get)).is_equal_to("value")
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        "text",
+        1.5,
+        None,
+        [],
+        {},
+        dict(b=[1, True, "x"], a=dict(c=None)),
+        ["a", dict(z=1, y=(2, 3))],
+    ],
+)
+@pytest.mark.parametrize("sort_keys", [True, False])
+def test_dumps(data, sort_keys):
+    expected = json.dumps(data, sort_keys=sort_keys, separators=(",", ":"))
+    assert_that(dumps(data, sort_keys=sort_keys)).is_equal_to(expected)
+
+
+def test_dumps_deep():
+    n = sys.getrecursionlimit() * 2
+    assert_that(dumps(nested(n))).is_equal_to("[" * (n + 1) + "]" * (n + 1))
+
+
+def test_dumps_default():
+    assert_that(dumps(dict(x=object), default=repr)).is_equal_to(
+        '{"x":"<class \'object\'>"}'
+    )